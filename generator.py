@@ -13,6 +13,8 @@ if __name__ == '__main__':
         'How many rows a single worker generates'))
     args_to_parse.add_argument('--max-parallel-workers', type=int, default=4, help=(
         'How many parallel processes to use at max.'))
+    args_to_parse.add_argument('--batches-per-worker', type=int, default=2, help=(
+        'How many batches per worker to keep in flight at most.'))
     args_to_parse.add_argument('--rows', type=int, required=True, help=(
         'How many rows to generate for each scaler == 1.'))
     args_to_parse.add_argument('--truncate', action='store_true', default=False, help=(
@@ -21,6 +23,51 @@ if __name__ == '__main__':
         'Whether to do a dry run or not'))
     args_to_parse.add_argument('--vacuum-analyze', action='store_true', default=False, help=(
         'Run a VACUUM-ANALYZE after ingestion.'))
+    args_to_parse.add_argument('--vacuum-mode', default='vacuum-analyze',
+                               choices=('vacuum-analyze', 'analyze', 'vacuum-freeze'), help=(
+        'What --vacuum-analyze runs: VACUUM ANALYZE, ANALYZE only, or '
+        'VACUUM (FREEZE, ANALYZE).'))
+    args_to_parse.add_argument('--maintenance-workers', type=int, default=None, help=(
+        'How many connections to use at max for VACUUM and rebuilding indexes. '
+        'Defaults to --max-parallel-workers.'))
+    args_to_parse.add_argument('--maintenance-work-mem', default=None, help=(
+        'maintenance_work_mem to use for VACUUM and rebuilding indexes, e.g., 1GB.'))
+    args_to_parse.add_argument('--max-parallel-maintenance-workers', type=int, default=None, help=(
+        'max_parallel_maintenance_workers to use for VACUUM and rebuilding indexes.'))
+    args_to_parse.add_argument('--copy-format', choices=('csv', 'binary'), default='csv', help=(
+        'Whether to ingest data using the text (CSV) or binary COPY format.'))
+    args_to_parse.add_argument('--copy-chunk-rows', type=int, default=10000, help=(
+        'How many rows to serialize at once while streaming data to COPY.'))
+    args_to_parse.add_argument('--pipeline', action='store_true', default=False, help=(
+        'Generate data in chunks of --copy-chunk-rows while a background thread '
+        'ingests the previous chunks.'))
+    args_to_parse.add_argument('--shared-cache', action='store_true', default=False, help=(
+        'Share dependency data between all batches through shared memory, so that '
+        'children reference parent rows of any batch.'))
+    args_to_parse.add_argument('--shared-cache-rows', type=int, default=None, help=(
+        'Capacity of each shared dependency column. Defaults to the number of rows '
+        'generated for the parent table.'))
+    args_to_parse.add_argument('--client-serials', action='store_true', default=False, help=(
+        'Generate serial columns client-side from per-batch ranges instead of '
+        'calling nextval() for each row. Sequences are set once at the end. '
+        'Requires --truncate or --resume.'))
+    args_to_parse.add_argument('--fast-load', action='store_true', default=False, help=(
+        'Drop indexes and constraints before ingestion and rebuild them in parallel '
+        'afterwards. With --truncate, the first batch truncates and freezes its rows '
+        'using COPY FREEZE.'))
+    args_to_parse.add_argument('--unlogged', action='store_true', default=False, help=(
+        'Switch tables to UNLOGGED during ingestion and back to LOGGED afterwards.'))
+    args_to_parse.add_argument('--shard-index', type=int, default=0, help=(
+        'Which of the --shard-count shards of the batches to generate, starting at 0.'))
+    args_to_parse.add_argument('--shard-count', type=int, default=1, help=(
+        'Into how many shards to split the batches, e.g., one per client host. '
+        'All shards together generate the same data as a single run.'))
+    args_to_parse.add_argument('--checkpoint', action='store_true', default=False, help=(
+        'Record each ingested batch of each table in a checkpoint table, in the '
+        'same transaction as its data.'))
+    args_to_parse.add_argument('--resume', action='store_true', default=False, help=(
+        'Skip the batches recorded in the checkpoint table by a previous run with '
+        'the same arguments. Implies --checkpoint.'))
     args_to_parse.add_argument('--target', required=True, help=(
         'The Python file containing defintions for random data generation'))
     args = args_to_parse.parse_args()
@@ -7,6 +7,8 @@ from typing import Any, List, Type
 
 from mimesis.schema import Schema
 
+import lib.csv_format as csv_format
+
 from lib.random import Random
 
 
@@ -68,13 +70,8 @@ class BaseObject:
     def to_sql(self) -> str:
         """Convert this object to an SQL string.
         """
-        def to_str(value):
-            if value is None:
-                return ''
-
-            return str(value)
-
-        return '|'.join([to_str(value) for value in self.raw.values()])
+        return csv_format.DELIMITER.join(
+            [csv_format.format_value(value) for value in self.raw.values()])
 
     def set(self, key: str, value: Any):
         """Set the value of an entry in the underlying map."""
@@ -0,0 +1,154 @@
+"""
+Columnar container for the sampled data of a single table batch.
+"""
+
+from collections import OrderedDict
+from typing import Any, Dict, List, Sequence, Tuple, Type
+
+import numpy as np
+
+import lib.csv_format as csv_format
+
+from lib.keyspace import POSITIONAL_GENERATORS, UnitKeys
+from lib.random import Random
+from lib.table import ColumnPlan
+
+
+class Batch:
+    """Column-oriented sample data. Rows are only materialized on serialization."""
+
+    columns: 'OrderedDict[str, Sequence[Any]]'
+    nulls: Dict[str, np.ndarray]
+    num_rows: int
+
+    def __init__(self, columns: 'OrderedDict[str, Sequence[Any]]', num_rows: int,
+                 nulls: Dict[str, np.ndarray] = None):
+        self.columns = columns
+        self.nulls = nulls or {}
+        self.num_rows = num_rows
+
+    def __len__(self) -> int:
+        return self.num_rows
+
+    @classmethod
+    def _with_nulls(cls, values: Sequence[Any], nulls: np.ndarray) -> Sequence[Any]:
+        if nulls is None:
+            return values
+
+        values = np.array(values, dtype=object)
+        values[nulls] = None
+        return values
+
+    def column(self, name: str) -> Sequence[Any]:
+        """Retrieve all values of a column, NULLs are returned as None."""
+        return Batch._with_nulls(self.columns[name], self.nulls.get(name))
+
+    def slice(self, start: int, stop: int) -> 'Batch':
+        """Get a batch containing the rows from start to stop, data is not copied."""
+        stop = min(stop, self.num_rows)
+        columns = OrderedDict([
+            (name, values[start:stop]) for name, values in self.columns.items()])
+        nulls = {name: nulls[start:stop] for name, nulls in self.nulls.items()}
+
+        return Batch(columns, max(0, stop - start), nulls)
+
+    def take(self, indices: np.ndarray) -> 'Batch':
+        """Get a batch containing the rows at indices, data is copied."""
+        columns = OrderedDict([
+            (name, (values if isinstance(values, np.ndarray)
+                    else np.array(values, dtype=object))[indices])
+            for name, values in self.columns.items()])
+        nulls = {name: nulls[indices] for name, nulls in self.nulls.items()}
+
+        return Batch(columns, len(indices), nulls)
+
+    def non_null(self, name: str) -> Sequence[Any]:
+        """Retrieve the values of a column which are not NULL."""
+        values = self.columns[name]
+        nulls = self.nulls.get(name)
+        if nulls is None:
+            return values
+
+        return np.asarray(values)[~nulls]
+
+    @classmethod
+    def _scatter(cls, values: Sequence[Any], nulls: np.ndarray) -> np.ndarray:
+        """Spread the non-NULL values over a full-length column."""
+        if isinstance(values, np.ndarray) and values.dtype != object:
+            column = np.zeros(len(nulls), dtype=values.dtype)
+        else:
+            column = np.full(len(nulls), None, dtype=object)
+
+        column[~nulls] = values
+        return column
+
+    @classmethod
+    def _generate_column(cls, rand_gen: Type[Random], column_plan: ColumnPlan, cache,
+                         num_rows: int,
+                         keys: Type[UnitKeys] = None) -> Tuple[Sequence[Any], np.ndarray]:
+        """
+        Generate all values of a column at once. Generators not supporting the
+        `size` argument fall back to being called once per value.
+
+        The NULL mask of a column is drawn up-front so that only the values
+        which end up not being NULL are generated.
+        """
+        nulls = None
+        num_values = num_rows
+        if column_plan.none_prob:
+            nulls = rand_gen.bool_sample(column_plan.none_prob, size=num_rows)
+            num_values = num_rows - int(np.count_nonzero(nulls))
+
+        gen, args = column_plan.gen, column_plan.args
+        if getattr(gen, '__name__', None) in POSITIONAL_GENERATORS:
+            # Values belong to row positions, NULLs must not shift the values behind them
+            first = keys.first if keys else 1
+            return gen(rand_gen, first, *args, size=num_rows), nulls
+
+        if gen is Random.ref:
+            if not keys or column_plan.dependency not in keys.parents:
+                raise ValueError(f'No keys known for { column_plan.dependency }')
+
+            values = gen(rand_gen, *keys.parents[column_plan.dependency], size=num_values)
+
+        elif column_plan.dependency:
+            values = gen(rand_gen, cache.retrieve(column_plan.dependency), picks=num_values)
+
+        elif column_plan.vectorized:
+            values = gen(rand_gen, *args, size=num_values)
+
+        else:
+            values = [gen(rand_gen, *args) for _ in range(num_values)]
+
+        if nulls is not None:
+            values = Batch._scatter(values, nulls)
+
+        return values, nulls
+
+    @classmethod
+    def sample_from_source(cls, rand_gen: Type[Random], num_rows: int,
+                           plan: Sequence[ColumnPlan], cache,
+                           keys: Type[UnitKeys] = None) -> 'Batch':
+        """
+        Sample num_rows on the provided execution plan, one column at a time.
+        The keys of the rows and the parent keys they reference come from keys.
+        """
+        columns = OrderedDict()
+        nulls = {}
+        for column_plan in plan:
+            values, column_nulls = cls._generate_column(
+                rand_gen, column_plan, cache, num_rows, keys)
+
+            columns[column_plan.name] = values
+            if column_nulls is not None:
+                nulls[column_plan.name] = column_nulls
+
+        return cls(columns, num_rows, nulls)
+
+    def _format_columns(self) -> List[List[str]]:
+        return [csv_format.format_column(values, self.nulls.get(name))
+                for name, values in self.columns.items()]
+
+    def to_csv(self) -> str:
+        """Convert the whole batch to CSV at once, formatting a column at a time."""
+        return csv_format.format_rows(self._format_columns(), self.num_rows)
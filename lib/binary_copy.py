@@ -0,0 +1,200 @@
+"""
+This module encodes batches into PostgreSQL's binary COPY format.
+"""
+
+import struct
+
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence
+from uuid import UUID
+
+import numpy as np
+
+from lib.batch import Batch
+
+
+HEADER = b'PGCOPY\n\xff\r\n\x00' + struct.pack('!ii', 0, 0)
+TRAILER = struct.pack('!h', -1)
+NULL_FIELD = struct.pack('!i', -1)
+
+PG_EPOCH = np.datetime64('2000-01-01T00:00:00', 'us')
+PG_EPOCH_DATE = np.datetime64('2000-01-01', 'D')
+
+NUMERIC_POS = 0x0000
+NUMERIC_NEG = 0x4000
+NUMERIC_NAN = 0xC000
+
+# Fixed-width types and their (big-endian) wire representation
+FIXED_WIDTH_TYPES = {
+    'int2': '>i2',
+    'int4': '>i4',
+    'int8': '>i8',
+    'serial': '>i4',
+    'bigserial': '>i8',
+    'date': '>i4',
+    'timestamp': '>i8',
+    'timestamptz': '>i8',
+    'uuid': 'V16',
+}
+
+TEXT_TYPES = ('text', 'varchar', 'bpchar', 'json', 'xml')
+JSONB_VERSION = b'\x01'
+
+
+def _fill_nulls(values: Sequence[Any], nulls: Optional[np.ndarray], fill: Any) -> Sequence[Any]:
+    if nulls is None or not nulls.any():
+        return values
+
+    if isinstance(values, np.ndarray) and values.dtype != object:
+        # NULLs of typed columns are already filled with zeros
+        return values
+
+    values = np.array(values, dtype=object)
+    values[nulls] = fill
+    return values
+
+
+def _to_fixed_width(values: Sequence[Any], nulls: Optional[np.ndarray],
+                    pg_type: str) -> np.ndarray:
+    """Convert a column into an array of its fixed-width wire representation."""
+    if pg_type in ('date',):
+        days = np.asarray(values, dtype='datetime64[D]') - PG_EPOCH_DATE
+        return days.astype(np.int64).astype('>i4')
+
+    if pg_type in ('timestamp', 'timestamptz'):
+        micros = np.asarray(values, dtype='datetime64[us]') - PG_EPOCH
+        return micros.astype(np.int64).astype('>i8')
+
+    if pg_type == 'uuid' and isinstance(values, np.ndarray) and values.dtype.kind == 'U':
+        # NULLs of string columns are empty strings, all hex digits are parsed at once
+        values = np.where(values == '', str(UUID(int=0)), values)
+        return np.frombuffer(bytes.fromhex(''.join(values.tolist()).replace('-', '')),
+                             dtype='V16')
+
+    if pg_type == 'uuid':
+        values = _fill_nulls(values, nulls, UUID(int=0))
+        raw = b''.join([UUID(str(value)).bytes for value in values])
+        return np.frombuffer(raw, dtype='V16')
+
+    values = _fill_nulls(values, nulls, 0)
+    return np.asarray(values).astype(FIXED_WIDTH_TYPES[pg_type])
+
+
+def encode_numeric(value: Any) -> bytes:
+    """Encode a single numeric value, digits are stored in base 10000."""
+    dec = Decimal(str(value))
+    if dec.is_nan():
+        return struct.pack('!hhHh', 0, 0, NUMERIC_NAN, 0)
+
+    sign, digits, exponent = dec.as_tuple()
+    digits = ''.join(map(str, digits))
+    if exponent > 0:
+        digits += '0' * exponent
+        exponent = 0
+
+    dscale = -exponent
+    int_len = len(digits) + exponent
+    if int_len < 0:
+        int_part, frac_part = '', '0' * -int_len + digits
+    else:
+        int_part, frac_part = digits[:int_len], digits[int_len:]
+
+    int_part = int_part.zfill((len(int_part) + 3) // 4 * 4)
+    frac_part = frac_part.ljust((len(frac_part) + 3) // 4 * 4, '0')
+
+    groups = [int(int_part[idx:idx + 4]) for idx in range(0, len(int_part), 4)]
+    weight = len(groups) - 1
+    groups += [int(frac_part[idx:idx + 4]) for idx in range(0, len(frac_part), 4)]
+
+    while groups and groups[0] == 0:
+        groups.pop(0)
+        weight -= 1
+
+    while groups and groups[-1] == 0:
+        groups.pop()
+
+    if not groups:
+        sign, weight = 0, 0
+
+    header = struct.pack('!hhHh', len(groups), weight,
+                         NUMERIC_NEG if sign else NUMERIC_POS, dscale)
+    return header + struct.pack(f'!{ len(groups) }H', *groups)
+
+
+def _encode_variable(values: Sequence[Any], nulls: Optional[np.ndarray],
+                     pg_type: str) -> List[bytes]:
+    """Encode a column of variable-width values into length-prefixed fields."""
+    if pg_type == 'numeric':
+        encode = encode_numeric
+    elif pg_type in TEXT_TYPES:
+        encode = lambda value: str(value).encode('utf-8')
+    elif pg_type == 'jsonb':
+        encode = lambda value: JSONB_VERSION + str(value).encode('utf-8')
+    else:
+        raise ValueError(f'Binary COPY not supported for type: { pg_type }')
+
+    fields = []
+    null_list = nulls.tolist() if nulls is not None else None
+    for idx, value in enumerate(values):
+        if null_list is not None and null_list[idx]:
+            fields.append(NULL_FIELD)
+            continue
+
+        data = encode(value)
+        fields.append(struct.pack('!i', len(data)) + data)
+
+    return fields
+
+
+def _encode_fixed_batch(batch: Batch, pg_types: Sequence[str]) -> bytes:
+    """Encode a batch consisting only of non-NULL fixed-width columns at once."""
+    dtype = [('num_fields', '>i2')]
+    for idx, pg_type in enumerate(pg_types):
+        dtype += [(f'len{ idx }', '>i4'), (f'val{ idx }', FIXED_WIDTH_TYPES[pg_type])]
+
+    rows = np.empty(len(batch), dtype=dtype)
+    rows['num_fields'] = len(pg_types)
+    for idx, (name, pg_type) in enumerate(zip(batch.columns, pg_types)):
+        rows[f'len{ idx }'] = np.dtype(FIXED_WIDTH_TYPES[pg_type]).itemsize
+        rows[f'val{ idx }'] = _to_fixed_width(batch.columns[name], None, pg_type)
+
+    return rows.tobytes()
+
+
+def _encode_column(batch: Batch, name: str, pg_type: str) -> List[bytes]:
+    values = batch.columns[name]
+    nulls = batch.nulls.get(name)
+    if pg_type not in FIXED_WIDTH_TYPES:
+        return _encode_variable(values, nulls, pg_type)
+
+    fixed = _to_fixed_width(values, nulls, pg_type)
+    width = fixed.dtype.itemsize
+    length = struct.pack('!i', width)
+    raw = fixed.tobytes()
+    fields = [length + raw[idx:idx + width] for idx in range(0, len(raw), width)]
+
+    if nulls is not None:
+        for idx in np.flatnonzero(nulls):
+            fields[idx] = NULL_FIELD
+
+    return fields
+
+
+def encode_rows(batch: Batch, pg_types: Sequence[str]) -> bytes:
+    """Encode all rows of a batch, the types must follow the batch column order."""
+    if not len(batch):
+        return b''
+
+    has_nulls = any(nulls.any() for nulls in batch.nulls.values())
+    if pg_types and not has_nulls and all(
+            pg_type in FIXED_WIDTH_TYPES for pg_type in pg_types):
+        return _encode_fixed_batch(batch, pg_types)
+
+    num_fields = struct.pack('!h', len(pg_types))
+    columns = [_encode_column(batch, name, pg_type)
+               for name, pg_type in zip(batch.columns, pg_types)]
+
+    if not columns:
+        return num_fields * len(batch)
+
+    return b''.join([num_fields + b''.join(fields) for fields in zip(*columns)])
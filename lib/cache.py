@@ -4,14 +4,69 @@ This module is responsible for caching data of dependencies.
 
 from typing import AbstractSet, Any, Dict, Mapping, List, Sequence, Tuple
 
+import numpy as np
+
 from loguru import logger
 
+from lib.batch import Batch
+
+
+class CacheColumn:
+    """Typed, contiguous array of cached values which grows in chunks."""
+
+    CHUNK_SIZE = 4096
+
+    _data: np.ndarray
+    _size: int
+
+    def __init__(self):
+        self._data = None
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _reserve(self, dtype: np.dtype, size: int) -> None:
+        if self._data is None:
+            capacity = max(CacheColumn.CHUNK_SIZE, size)
+            self._data = np.empty(capacity, dtype=dtype)
+            return
+
+        dtype = np.result_type(self._data.dtype, dtype)
+        capacity = len(self._data)
+        if size <= capacity and dtype == self._data.dtype:
+            return
+
+        while capacity < size:
+            capacity += max(capacity, CacheColumn.CHUNK_SIZE)
+
+        data = np.empty(capacity, dtype=dtype)
+        data[:self._size] = self._data[:self._size]
+        self._data = data
+
+    def extend(self, values: Sequence[Any]) -> None:
+        """Append values, the array grows by at least one chunk if required."""
+        values = np.asarray(values)
+        if not len(values):
+            return
+
+        self._reserve(values.dtype, self._size + len(values))
+        self._data[self._size:self._size + len(values)] = values
+        self._size += len(values)
+
+    def values(self) -> np.ndarray:
+        """Get a view on all values added so far."""
+        if self._data is None:
+            return np.empty(0)
+
+        return self._data[:self._size]
+
 
 class Cache:
     """Cache to store objects required as dependencies later."""
 
     _cache_map: Dict[str, List[str]]
-    _store: Dict[str, List]
+    _store: Dict[str, CacheColumn]
 
     def __init__(self, cache_map_source: AbstractSet[Tuple[str, str]]):
         self._cache_map = Cache._build_cache_map(cache_map_source)
@@ -40,7 +95,7 @@ class Cache:
         for table, columns in self._cache_map.items():
             for column in columns:
                 path = Cache.build_path(table, column)
-                self._store[path] = []
+                self._store[path] = CacheColumn()
 
     def add(self, table_name: str, data: Sequence[Mapping[str, Sequence]]) -> None:
         """Cache all columns that need to be cached."""
@@ -49,11 +104,31 @@ class Cache:
             return
 
         logger.debug(f'Caching { table_name } data for columns { columns }.')
-        for row in data:
+        if isinstance(data, Batch):
             for column in columns:
                 path = Cache.build_path(table_name, column)
-                self._store[path].append(row.get(column))
+                self._store[path].extend(data.non_null(column))
+            return
+
+        for column in columns:
+            path = Cache.build_path(table_name, column)
+            self._store[path].extend([row.get(column) for row in data])
+
+    def load(self, path: str, values: Sequence[Any]) -> None:
+        """Add values of a single column, e.g., received from another process."""
+        if path in self._store:
+            self._store[path].extend(values)
+
+    def retrieve_table(self, table_name: str) -> Dict[str, np.ndarray]:
+        """Retrieve all cached columns of a table by their paths."""
+        paths = [Cache.build_path(table_name, column)
+                 for column in self._cache_map.get(table_name, [])]
+        return {path: self.retrieve(path) for path in paths}
+
+    def retrieve(self, path: str) -> np.ndarray:
+        """Retrieve a cached column by its path."""
+        column = self._store.get(path)
+        if column is None:
+            return np.empty(0)
 
-    def retrieve(self, path: str) -> Sequence[Any]:
-        """Retrieve a cached object by its path."""
-        return self._store.get(path, [])
+        return column.values()
@@ -0,0 +1,87 @@
+"""
+This module formats data for COPY in CSV format, a column at a time.
+"""
+
+import re
+
+from typing import Any, List, Optional, Sequence
+
+import numpy as np
+
+
+DELIMITER = '|'
+QUOTE = '"'
+
+# Values containing any of these must be quoted, otherwise COPY splits them
+# apart or aborts
+NEEDS_QUOTING_RE = re.compile(r'[|"\r\n]')
+
+# A value consisting of this only would end the data unless quoted
+END_OF_DATA = '\\.'
+
+
+def quote(value: str) -> str:
+    """
+    Quote a single value if required. Empty strings are quoted as well, since
+    an unquoted empty value is NULL.
+    """
+    if value and value != END_OF_DATA and not NEEDS_QUOTING_RE.search(value):
+        return value
+
+    return QUOTE + value.replace(QUOTE, QUOTE + QUOTE) + QUOTE
+
+
+def format_value(value: Any) -> str:
+    """Format a single value, None is NULL."""
+    if value is None:
+        return ''
+
+    return quote(str(value))
+
+
+def _format_strings(values: np.ndarray, nulls: Optional[np.ndarray]) -> List[str]:
+    strings = values.tolist()
+    empty = values == ''
+    if nulls is not None:
+        empty &= ~nulls
+
+    # Check the whole column at once, only quote value by value if required
+    if (not empty.any() and END_OF_DATA not in strings
+            and not NEEDS_QUOTING_RE.search('\0'.join(strings))):
+        return strings
+
+    return [quote(value) for value in strings]
+
+
+def format_column(values: Sequence[Any], nulls: Optional[np.ndarray] = None) -> List[str]:
+    """Format all values of a column, NULLs being None or marked by nulls."""
+    kind = values.dtype.kind if isinstance(values, np.ndarray) else None
+    if kind in ('i', 'u', 'b', 'f'):
+        # Numbers never need quoting
+        strings = values.astype(str).tolist()
+
+    elif kind == 'M':
+        strings = np.datetime_as_string(values).tolist()
+
+    elif kind == 'U':
+        strings = _format_strings(values, nulls)
+
+    else:
+        strings = [format_value(value) for value in values]
+
+    if nulls is not None:
+        for idx in np.flatnonzero(nulls).tolist():
+            strings[idx] = ''
+
+    return strings
+
+
+def format_rows(columns: Sequence[List[str]], num_rows: int) -> str:
+    """Assemble formatted columns into rows, the result ends with a newline."""
+    if not num_rows:
+        return ''
+
+    if not columns:
+        return '\n' * num_rows
+
+    return '\n'.join([DELIMITER.join(row) for row in zip(*columns)]) + '\n'
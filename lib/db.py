@@ -2,66 +2,299 @@
 This module provides core functionality for database access.
 """
 
-from io import StringIO
-from typing import Mapping, Sequence, Type
+from contextlib import contextmanager
+from typing import (Any, AnyStr, Callable, Dict, Iterable, Iterator, List, Mapping, Sequence,
+                    Tuple, Type)
 
 import psycopg2
 
 from loguru import logger
 
-from lib.base_object import BaseObject
+import lib.binary_copy as binary_copy
+
+from lib.batch import Batch
 from lib.table import Column
 
 
+class CopyStream:
+    """
+    File-like object handed to COPY, which serializes chunks lazily whenever
+    data is read from it. Only the current chunk is held in memory.
+    """
+
+    def __init__(self, chunks: Iterator[AnyStr]):
+        self._chunks = iter(chunks)
+        self._current = ''
+        self._pos = 0
+
+    def _next_chunk(self) -> bool:
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            return False
+
+        self._current = chunk
+        self._pos = 0
+        return True
+
+    def read(self, size: int = -1) -> AnyStr:
+        """Read up to size characters (bytes), or everything if size is negative."""
+        parts = []
+        remaining = size
+        while size < 0 or remaining > 0:
+            if self._pos >= len(self._current) and not self._next_chunk():
+                break
+
+            if size < 0:
+                part = self._current[self._pos:]
+            else:
+                part = self._current[self._pos:self._pos + remaining]
+                remaining -= len(part)
+
+            self._pos += len(part)
+            parts.append(part)
+
+        return self._current[:0].join(parts)
+
+
 class DB:
     """Helper class to provide core database functionality, e.g., running queries."""
-    def __init__(self, dsn: str):
+
+    CHUNK_ROWS = 10000
+
+    # Units of table and batch ingested so far, see --checkpoint
+    CHECKPOINT_TABLE = 'datagen_checkpoints'
+
+    # Errors after which the connection might be broken
+    CONNECTION_ERRORS = (psycopg2.OperationalError, psycopg2.InterfaceError)
+
+    def __init__(self, dsn: str, settings: Mapping[str, Any] = None):
         self.conn = None
         self.cur = None
         self.dsn = dsn
+        self.settings = settings or {}
+        self.connections = 0
+        self.in_transaction = False
 
     def __enter__(self):
+        self.connect()
+        return self
+
+    def __exit__(self, typ, value, traceback):
+        self.close()
+
+    @property
+    def closed(self) -> bool:
+        """Whether there is no usable connection."""
+        return self.conn is None or bool(self.conn.closed)
+
+    def connect(self):
+        """Open the connection and apply the settings, if any."""
         self.conn = psycopg2.connect(self.dsn)
         self.conn.autocommit = True
         self.cur = self.conn.cursor()
+        self.connections += 1
+        self.set_settings(self.settings)
 
-        return self
-
-    def __exit__(self, typ, value, traceback):
+    def close(self):
+        """Close the connection, if any."""
         if self.cur:
             self.cur.close()
 
         if self.conn:
             self.conn.close()
 
+    def reconnect(self):
+        """Replace the current connection with a new one."""
+        try:
+            self.close()
+        except self.CONNECTION_ERRORS:
+            pass
+
+        self.connect()
+
+    def call_with_reconnect(self, func: Callable[['DB'], Any], retries: int = 1) -> Any:
+        """
+        Run func on this connection. If the connection breaks, reconnect and
+        retry up to retries times.
+        """
+        for attempt in range(retries + 1):
+            if self.closed:
+                self.reconnect()
+
+            try:
+                return func(self)
+
+            except self.CONNECTION_ERRORS as exc:
+                if attempt == retries or not self.closed:
+                    raise
+
+                logger.warning(f'Lost database connection ({ exc }), reconnecting')
+
+        return None
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Run all statements within one transaction, nested calls join the outer one."""
+        if self.in_transaction:
+            yield
+            return
+
+        self.cur.execute('BEGIN')
+        self.in_transaction = True
+        try:
+            yield
+            self.cur.execute('COMMIT')
+
+        except Exception:
+            if not self.closed:
+                self.cur.execute('ROLLBACK')
+            raise
+
+        finally:
+            self.in_transaction = False
+
+    @classmethod
+    def _batches_to_csv(cls, batches: Iterable[Type[Batch]],
+                        chunk_rows: int) -> Type[CopyStream]:
+        def chunks():
+            for batch in batches:
+                for start in range(0, len(batch), chunk_rows):
+                    yield batch.slice(start, start + chunk_rows).to_csv()
+
+        return CopyStream(chunks())
+
     @classmethod
-    def _objs_to_csv(cls, objs: Sequence[Type[BaseObject]]) -> Type[StringIO]:
-        data = StringIO()
-        for obj in objs:
-            data.write(obj.to_sql() + '\n')
+    def _batches_to_binary(cls, batches: Iterable[Type[Batch]], pg_types: Sequence[str],
+                           chunk_rows: int) -> Type[CopyStream]:
+        def chunks():
+            yield binary_copy.HEADER
+            for batch in batches:
+                for start in range(0, len(batch), chunk_rows):
+                    yield binary_copy.encode_rows(
+                        batch.slice(start, start + chunk_rows), pg_types)
+            yield binary_copy.TRAILER
 
-        data.seek(0)
-        return data
+        return CopyStream(chunks())
 
-    def ingest_table(self, table: str, schema: Mapping[str, Type[Column]],
-                     objs: Sequence[BaseObject]):
+    def ingest_batches(self, table: str, schema: Mapping[str, Type[Column]],
+                       batches: Iterable[Batch], copy_format: str = 'csv',
+                       chunk_rows: int = CHUNK_ROWS, truncate: bool = False,
+                       checkpoint: Tuple[str, int, int, str] = None):
+        """
+        Ingest all batches into the target table using a single COPY. Batches are
+        serialized in chunks of chunk_rows while COPY consumes them. With
+        truncate, the table is truncated in the same transaction, which allows
+        COPY to write frozen rows right away. A checkpoint of (table, batch_id,
+        seed, fingerprint) is recorded in the same transaction as well.
+        """
+        columns = [(name, column) for name, column in schema.items() if column.gen != 'skip']
+        column_names = ','.join([f'"{ name }"' for name, _ in columns])
+
+        def copy(options: str = ''):
+            if copy_format == 'binary':
+                pg_types = [column.pg_type for _, column in columns]
+                self.cur.copy_expert(f'''
+                    COPY { table }({ column_names })
+                    FROM STDIN
+                    WITH(FORMAT BINARY{ options })''',
+                    DB._batches_to_binary(batches, pg_types, chunk_rows))
+                return
+
+            self.cur.copy_expert(f'''
+                COPY { table }({ column_names })
+                FROM STDIN
+                WITH(FORMAT CSV, DELIMITER '|'{ options })''',
+                DB._batches_to_csv(batches, chunk_rows))
+
+        if not truncate and not checkpoint:
+            copy()
+            return
+
+        with self.transaction():
+            if truncate:
+                self.cur.execute(f'TRUNCATE { table }')
+                copy(', FREEZE')
+            else:
+                copy()
+
+            if checkpoint:
+                self.add_checkpoint(*checkpoint)
+
+    def ingest_table(self, table: str, schema: Mapping[str, Type[Column]], batch: Batch,
+                     copy_format: str = 'csv', chunk_rows: int = CHUNK_ROWS,
+                     truncate: bool = False):
         """Ingest provided data into the target table."""
-        logger.info(f'Ingesting { table }: { len(objs) }')
+        logger.info(f'Ingesting { table }: { len(batch) }')
+        self.ingest_batches(table, schema, [batch], copy_format, chunk_rows, truncate)
+
+    def get_indexes(self, table: str) -> List[Tuple[str, str]]:
+        """(name, definition) of all indexes of a table not backing a constraint."""
+        self.cur.execute('''
+            SELECT i.indexrelid::regclass::text, pg_get_indexdef(i.indexrelid)
+            FROM pg_index i
+            WHERE i.indrelid = %s::regclass
+              AND NOT EXISTS (
+                SELECT 1 FROM pg_constraint c
+                WHERE c.conrelid = i.indrelid AND c.conindid = i.indexrelid)
+            ORDER BY 1''', (table,))
+        return self.cur.fetchall()
+
+    def get_constraints(self, table: str) -> List[Tuple[str, str, str, str]]:
+        """
+        (table, name, type, definition) of all primary key, unique, exclusion
+        and foreign key constraints of a table, and of all foreign keys
+        referencing it.
+        """
+        self.cur.execute('''
+            SELECT conrelid::regclass::text, conname, contype, pg_get_constraintdef(oid)
+            FROM pg_constraint
+            WHERE (conrelid = %s::regclass AND contype IN ('p', 'u', 'x', 'f'))
+               OR (confrelid = %s::regclass AND contype = 'f')
+            ORDER BY 1, 2''', (table, table))
+        return self.cur.fetchall()
+
+    def get_table_sizes(self, tables: Sequence[str]) -> Dict[str, int]:
+        """Total size in bytes of each table, including its indexes and TOAST data."""
+        self.cur.execute('''
+            SELECT t, pg_total_relation_size(t::regclass)
+            FROM unnest(%s::text[]) t''', (list(tables),))
+        return dict(self.cur.fetchall())
+
+    def set_settings(self, settings: Mapping[str, Any]):
+        """Set configuration parameters for the rest of the session."""
+        for name, value in settings.items():
+            self.cur.execute('SELECT set_config(%s, %s, false)', (name, str(value)))
+
+    def create_checkpoint_table(self):
+        """Create the checkpoint table, unless it exists."""
+        self.cur.execute(f'''
+            CREATE TABLE IF NOT EXISTS { self.CHECKPOINT_TABLE }(
+                table_name TEXT NOT NULL,
+                batch_id INT NOT NULL,
+                seed BIGINT NOT NULL,
+                fingerprint TEXT NOT NULL,
+                PRIMARY KEY (table_name, batch_id)
+            )''')
 
-        columns = ','.join(
-            [f'"{ name }"' for name, column in schema.items() if column.gen != 'skip'])
+    def get_checkpoints(self) -> List[Tuple[str, int, int, str]]:
+        """(table, batch_id, seed, fingerprint) of all units in the checkpoint table."""
+        self.cur.execute(f'''
+            SELECT table_name, batch_id, seed, fingerprint
+            FROM { self.CHECKPOINT_TABLE }''')
+        return self.cur.fetchall()
 
-        self.cur.copy_expert(f'''
-            COPY { table }({ columns })
-            FROM STDIN
-            WITH(FORMAT CSV, DELIMITER '|')''', DB._objs_to_csv(objs))
+    def add_checkpoint(self, table: str, batch_id: int, seed: int, fingerprint: str):
+        """Record a unit as ingested."""
+        self.cur.execute(f'INSERT INTO { self.CHECKPOINT_TABLE } VALUES (%s, %s, %s, %s)',
+                         (table, batch_id, seed, fingerprint))
 
     def truncate_table(self, table: str):
         """Truncate the target table."""
         logger.info(f'Truncating { table }')
         self.cur.execute(f'TRUNCATE { table } CASCADE')
 
-    def vacuum_analyze_table(self, table: str):
-        """VACUUM-ANALYZE the target table."""
-        logger.info(f'Running VACUUM-ANALYZE on { table }')
-        self.cur.execute(f'VACUUM ANALYZE { table }')
+    def set_serial(self, table: str, column: str, value: int):
+        """Set the sequence of a serial column, the next value will be value + 1."""
+        logger.info(f'Setting sequence of { table }.{ column } to { value }')
+        self.cur.execute('SELECT setval(pg_get_serial_sequence(%s, %s), %s)',
+                         (table, column, value))
@@ -2,26 +2,112 @@
 This module controls execution of the random data generator.
 """
 
+import hashlib
+import itertools
 import math
+import multiprocessing
+import os
 import sys
+import time
+import zlib
 
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import contextmanager
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
 from importlib.machinery import SourceFileLoader
-from typing import AbstractSet, Any, Callable, Mapping, List, Sequence, Tuple, Type, Union
+from multiprocessing.util import Finalize
+from typing import (AbstractSet, Any, Callable, Dict, Iterable, Iterator, Mapping, List, Optional,
+                    Sequence, Tuple, Type, Union)
 
-from lib.base_object import BaseObject
+from lib.batch import Batch
 from lib.cache import Cache
 from lib.db import DB
+from lib.fast_load import FastLoad
+from lib.keyspace import KEY_LIMITS, KEY_MIXES, POSITIONAL_GENERATORS, KeySpace, UnitKeys
+from lib.maintenance import VACUUM_COMMANDS, MaintenancePool, largest_first
+from lib.partitioning import is_routable, route_batch
+from lib.pipeline import IngestPipeline
 from lib.random import Random
+from lib.scheduler import DagScheduler, Unit
+from lib.shared_cache import SharedCache, SharedStore
 from lib.table import Table
 
+import numpy as np
+
 from loguru import logger
 
 
+# Database connection and executor of a pool worker, set up once by the pool
+# initializer and reused for all tasks the worker processes.
+_worker_db: DB = None
+_worker_executor: 'Executor' = None
+_worker_lock: Any = None
+_worker_store: SharedStore = None
+
+# Binary COPY sends naive timestamps as UTC, CSV values of timestamptz
+# columns must be read as UTC as well
+WORKER_SETTINGS = {'TimeZone': 'UTC'}
+
+
+def _init_worker(dsn: str, executor: 'Executor' = None, lock: Any = None) -> None:
+    global _worker_db, _worker_executor, _worker_lock
+
+    _worker_db = DB(dsn, WORKER_SETTINGS)
+    _worker_db.connect()
+    Finalize(_worker_db, _worker_db.close, exitpriority=10)
+
+    _worker_executor = executor
+    _worker_lock = lock
+
+
+def _get_worker_db() -> DB:
+    if _worker_db.closed:
+        _worker_db.reconnect()
+
+    return _worker_db
+
+
+def _get_worker_store(specs: Mapping[str, Tuple[str, str, int]]) -> SharedStore:
+    """Attach to the shared dependency store once per worker."""
+    global _worker_store
+
+    if _worker_store is None:
+        _worker_store = SharedStore(specs)
+
+    return _worker_store
+
+
+def _get_worker_stats() -> Tuple[int, int]:
+    """Return (pid, connections opened) of the current worker."""
+    return os.getpid(), _worker_db.connections
+
+
+def _run_unit_task(unit: Type[Unit],
+                   dep_data: Mapping[str, Any]) -> Tuple[Dict[str, Any], Tuple[int, int]]:
+    """Pool task, avoids pickling the executor with every submitted unit."""
+    return _worker_executor._run_unit(unit, dep_data)
+
+
+def _run_db_cmd_task(cmd: str, table_name: str) -> Tuple[int, int]:
+    """Pool task running a command on a table."""
+    return _worker_executor._run_db_cmd_on_table(cmd, table_name)
+
+
 class Executor:
     graph: Mapping[str, Sequence[str]]
     entrypoint: str
     tables: Mapping[str, Type[Table]]
+    deps: AbstractSet[Tuple[str, str]] = frozenset()
+    shared_specs: Mapping[str, Tuple[str, str, int]] = None
+    keyspace: KeySpace = None
+    refs: Mapping[str, Mapping[str, str]] = {}
+    serials: Mapping[str, List[str]] = {}
+    freeze: bool = False
+    checkpoint: bool = False
+    fingerprints: Mapping[str, str] = {}
+    # (table, batch_id) of units loaded by a previous run, see --resume
+    done: AbstractSet[Tuple[str, int]] = frozenset()
+    timings: Dict[str, float] = None
+    task_timings: Dict[str, float] = None
 
     def __init__(self, args: object) -> None:
         self.args = args
@@ -50,14 +136,33 @@ class Executor:
 
         return sequence
 
-    def _get_batches(self) -> List[Tuple[int, int]]:
-        """Calculate batches based on runtime arguments."""
+    def _get_batches(self) -> Iterator[Tuple[int, int]]:
+        """
+        Calculate batches based on runtime arguments, lazily. With sharding,
+        only every shard_count-th batch starting at shard_index is part of
+        this run, ids and sizes being the same as for a single run.
+        """
         total_rows = self.args.rows
         batch_size = self.args.batch_size
-        batch_sizes = [min(x + batch_size, total_rows) - x
-                       for x in range(0, total_rows, batch_size)]
-
-        return [(idx + 1, batch_size) for idx, batch_size in enumerate(batch_sizes)]
+        for idx, start in enumerate(range(0, total_rows, batch_size)):
+            if idx % self.args.shard_count == self.args.shard_index:
+                yield idx + 1, min(start + batch_size, total_rows) - start
+
+    def _check_sharding(self) -> None:
+        """Ensure the shard is valid and no option affects data of other shards."""
+        if not 0 <= self.args.shard_index < self.args.shard_count:
+            raise ValueError(f'Shard index { self.args.shard_index } is out of range for '
+                             f'{ self.args.shard_count } shards')
+
+        if self.args.shard_count > 1:
+            options = [option for option, enabled in (
+                ('--truncate', self.args.truncate),
+                ('--fast-load', self.args.fast_load),
+                ('--unlogged', self.args.unlogged),
+            ) if enabled]
+            if options:
+                raise ValueError(f'{ ", ".join(options) } cannot be used with multiple shards, '
+                                 'as other shards load the same tables')
 
     @classmethod
     def _get_num_rows_to_gen(cls, rand_gen: Type[Random], num_rows: int,
@@ -80,72 +185,528 @@ class Executor:
 
         return max(1, math.ceil(rows_to_gen))
 
-    def _run_helper(self, sequence: Sequence[str],
-                    deps: AbstractSet[Tuple[str, str]], seed: int,
-                    num_rows: int) -> None:
-        cache = Cache(deps)
+    def _get_keyspace(self) -> KeySpace:
+        """Row-count plan of all tables, based on runtime arguments."""
+        scalers = {table_name: table.scaler for table_name, table in self.tables.items()}
+        return KeySpace(scalers, self.args.rows, self.args.batch_size)
+
+    def _get_total_rows(self, table_name: str) -> Optional[int]:
+        """
+        Number of rows generated for a table over all batches. Only known in
+        advance for constant scalers.
+        """
+        return self._get_keyspace().table_rows(table_name)
+
+    def _get_references(self) -> Dict[str, Dict[str, str]]:
+        """
+        Key generator of each column referenced with 'ref', by table. Columns
+        of the same parent may use different key generators.
+        """
+        return {
+            table_name: {
+                Cache.build_path(parent, column_name): self.tables[parent].schema[column_name].gen
+                for parent, column_name in table.get_column_references()
+            }
+            for table_name, table in self.tables.items()
+        }
+
+    def _check_references(self, keyspace: Type[KeySpace]) -> None:
+        """Ensure row positions and 'ref' keys can be derived from the row-count plan."""
+        for table_name, table in self.tables.items():
+            for column in table.schema.values():
+                if column.gen not in POSITIONAL_GENERATORS:
+                    continue
+
+                if table_name not in keyspace:
+                    raise ValueError(f'Table { table_name } uses { column.gen }, '
+                                     'which requires a constant scaler')
+
+                limit = KEY_LIMITS.get(column.gen)
+                if limit and keyspace.table_rows(table_name) > limit:
+                    raise ValueError(f'Too many rows in { table_name } for unique keys '
+                                     f'of { column.gen }, at most { limit } are possible')
+
+            for parent, column_name in table.get_column_references():
+                if parent not in keyspace:
+                    raise ValueError(f'Table { parent } is referenced by { table_name }, '
+                                     'which requires a constant scaler')
+
+                column = self.tables[parent].schema.get(column_name)
+                if column is None or column.gen not in KEY_MIXES:
+                    raise ValueError(f'Column { parent }.{ column_name } is referenced by '
+                                     f'{ table_name }, but is not generated by any of '
+                                     f'{ sorted(KEY_MIXES) }')
+
+    def _create_shared_store(self) -> SharedStore:
+        """Create shared memory columns for all dependencies."""
+        layout = {}
+        for table_name, column_name in sorted(self.deps):
+            capacity = self.args.shared_cache_rows or self._get_total_rows(table_name)
+            if capacity is None:
+                raise ValueError(f'Cannot size the shared cache for { table_name }, '
+                                 'use --shared-cache-rows')
+
+            column = self.tables[table_name].schema[column_name]
+            path = Cache.build_path(table_name, column_name)
+            layout[path] = (SharedStore.get_dtype(column), capacity)
+
+        logger.info(f'Sharing dependency columns: { layout }')
+        return SharedStore.create(layout)
+
+    @classmethod
+    def _get_unit_seed(cls, table_name: str, batch_id: int) -> int:
+        """Derive a reproducible seed for a single table of a single batch."""
+        entropy = [batch_id, zlib.crc32(table_name.encode('utf-8'))]
+        return int(np.random.SeedSequence(entropy).generate_state(1)[0])
+
+    def _ingest(self, table_name: str, rand_gen: Type[Random], rows_to_gen: int,
+                cache: Type[Cache], keys: Type[UnitKeys] = None, truncate: bool = False,
+                checkpoint: Tuple[str, int, int, str] = None) -> None:
+        table = self.tables[table_name]
+        data = Batch.sample_from_source(rand_gen, rows_to_gen, table.get_plan(), cache, keys)
+
+        targets = [(table_name, data)]
+        if table.partitioning:
+            # Each worker starts with a different partition to spread the COPYs
+            targets = route_batch(table_name, table.partitioning, data, os.getpid())
+
+        def ingest(db):
+            # All partitions and the checkpoint are committed at once
+            with db.transaction():
+                for target, target_data in targets:
+                    db.ingest_table(target, table.schema, target_data, self.args.copy_format,
+                                    self.args.copy_chunk_rows, truncate)
+
+                if checkpoint:
+                    db.add_checkpoint(*checkpoint)
+
+        _get_worker_db().call_with_reconnect(ingest)
+        cache.add(table_name, data)
+
+    def _sample_chunks(self, table_name: str, rand_gen: Type[Random], rows_to_gen: int,
+                       cache: Type[Cache], keys: Type[UnitKeys] = None) -> Iterator[Batch]:
+        """Generate the data of a unit in chunks of --copy-chunk-rows, lazily."""
+        table = self.tables[table_name]
+        chunk_rows = self.args.copy_chunk_rows
+        for start in range(0, rows_to_gen, chunk_rows):
+            chunk_keys = keys
+            if keys and keys.first is not None:
+                chunk_keys = keys._replace(first=keys.first + start)
+
+            data = Batch.sample_from_source(
+                rand_gen, min(chunk_rows, rows_to_gen - start), table.get_plan(), cache,
+                chunk_keys)
+            cache.add(table_name, data)
+            yield data
+
+    def _ingest_pipelined(self, table_name: str, rand_gen: Type[Random], rows_to_gen: int,
+                          cache: Type[Cache], keys: Type[UnitKeys] = None,
+                          truncate: bool = False,
+                          checkpoint: Tuple[str, int, int, str] = None) -> None:
+        """
+        Like _ingest, but data is generated in chunks which a background
+        thread streams to the database while the next chunk is generated.
+        """
+        table = self.tables[table_name]
+        pipeline = IngestPipeline(
+            _get_worker_db(), self.args.copy_format, self.args.copy_chunk_rows)
+        pipeline.start()
+
+        try:
+            pipeline.begin(table_name, table.schema, truncate, checkpoint)
+            for data in self._sample_chunks(table_name, rand_gen, rows_to_gen, cache, keys):
+                pipeline.put(data)
+            pipeline.end()
+
+        except Exception:
+            pipeline.abort()
+            raise
+
+        pipeline.close()
+
+    def _regenerate(self, table_name: str, rand_gen: Type[Random], rows_to_gen: int,
+                    cache: Type[Cache], keys: Type[UnitKeys] = None,
+                    pipelined: bool = False) -> None:
+        """
+        Generate the data of a unit loaded by a previous run without ingesting
+        it, if children depend on it. The data is generated the same way as
+        when it was ingested, so it is the same as well.
+        """
+        if not any(table == table_name for table, _ in self.deps):
+            return
+
+        if pipelined:
+            for _ in self._sample_chunks(table_name, rand_gen, rows_to_gen, cache, keys):
+                pass
+            return
+
+        plan = self.tables[table_name].get_plan()
+        cache.add(table_name, Batch.sample_from_source(rand_gen, rows_to_gen, plan, cache, keys))
+
+    def _run_unit(self, unit: Type[Unit],
+                  dep_data: Mapping[str, Any]) -> Tuple[Dict[str, Any], Tuple[int, int]]:
+        """
+        Generate and ingest a single table of a single batch. Returns the
+        cached data children of the table depend on, and worker stats.
+        """
+        if self.shared_specs:
+            cache = SharedCache(self.deps, _get_worker_store(self.shared_specs), _worker_lock)
+        else:
+            cache = Cache(self.deps)
+
+        for path, values in dep_data.items():
+            cache.load(path, values)
+
+        seed = Executor._get_unit_seed(unit.table, unit.batch_id)
+        rand_gen = Random(seed=seed)
+        rows_to_gen = Executor._get_num_rows_to_gen(
+            rand_gen, unit.batch_size, self.tables[unit.table].scaler)
 
-        with DB(self.args.dsn) as dbconn:
-            rand_gen = Random(seed=seed)
-            for table_name in sequence:
-                table = self.tables[table_name]
+        keys = None
+        if self.keyspace:
+            keys = self.keyspace.unit_keys(unit.table, unit.batch_id, self.refs.get(unit.table))
 
-                rows_to_gen = Executor._get_num_rows_to_gen(
-                    rand_gen, num_rows, table.scaler)
+        # The first batch truncates, so that COPY can freeze its rows. COPY
+        # cannot freeze partitioned tables, they are truncated up-front.
+        partitioned = self.tables[unit.table].partitioning is not None
+        truncate = self.freeze and unit.batch_id == 1 and not partitioned
 
-                logger.info(f'Generating {rows_to_gen} rows (seed {seed}) for table { table_name }')
+        logger.info(f'Generating {rows_to_gen} rows (batch {unit.batch_id}, seed {seed}) '
+                    f'for table { unit.table }')
 
-                data = BaseObject.sample_from_source(rand_gen, rows_to_gen, table.schema, cache)
-                dbconn.ingest_table(table_name, table.schema, data)
-                cache.add(table_name, data)
+        checkpoint = None
+        if self.checkpoint:
+            checkpoint = (unit.table, unit.batch_id, seed, self.fingerprints[unit.table])
+
+        # Routing to partitions needs the whole batch at once
+        pipelined = self.args.pipeline and not partitioned
+        if (unit.table, unit.batch_id) in self.done:
+            logger.info(f'Skipping batch { unit.batch_id } of { unit.table }, loaded before')
+            self._regenerate(unit.table, rand_gen, rows_to_gen, cache, keys, pipelined)
+
+        elif pipelined:
+            self._ingest_pipelined(
+                unit.table, rand_gen, rows_to_gen, cache, keys, truncate, checkpoint)
+        else:
+            self._ingest(unit.table, rand_gen, rows_to_gen, cache, keys, truncate, checkpoint)
+
+        return cache.retrieve_table(unit.table), _get_worker_stats()
+
+    def _run_dag(self, executor: Type[ProcessPoolExecutor], scheduler: Type[DagScheduler],
+                 batches: Iterator[Tuple[int, int]], connections: Dict[int, int]) -> None:
+        """
+        Run all units, each as soon as the units of its parent tables are done.
+        Only a window of batches is in flight at any time, further batches are
+        added once earlier ones are done. The connections opened by each
+        worker are tracked in connections.
+        """
+        window = max(1, self.args.batches_per_worker * self.args.max_parallel_workers)
+        futures = {}
+
+        def submit(units):
+            for unit in units:
+                future = executor.submit(_run_unit_task, unit, scheduler.dependency_data(unit))
+                futures[future] = unit
+
+        def fill_window():
+            while scheduler.num_open_batches < window:
+                batch = next(batches, None)
+                if batch is None:
+                    return
+
+                submit(scheduler.add_batch(*batch))
+
+        fill_window()
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                unit = futures.pop(future)
+                try:
+                    dep_data, stats = future.result()
+                except Exception as exc:
+                    logger.exception(exc)
+                    sys.exit(1)
+
+                Executor._add_worker_stats(connections, [stats])
+                submit(scheduler.complete(unit, dep_data))
+                fill_window()
 
     @classmethod
     def _execute_in_parallel(cls, executor: Type[ProcessPoolExecutor],
-                             tasks: Tuple[Callable[[Any], None], Tuple[Any, ...]]):
+                             tasks: Tuple[Callable[[Any], None], Tuple[Any, ...]]) -> List[Any]:
         """Run set of tasks in parallel using the provided executor."""
         all_futures = []
         for task, args in tasks:
             all_futures.append(executor.submit(task, *args))
 
+        results = []
         for future in as_completed(all_futures):
             try:
-                future.result()
+                results.append(future.result())
             except Exception as exc:
                 logger.exception(exc)
                 sys.exit(1)
 
-    def _run_db_cmd_on_table(self, cmd: str, table_name: str) -> None:
-        with DB(self.args.dsn) as db:
-            if cmd == 'truncate':
-                db.truncate_table(table_name)
+        return results
+
+    def _run_db_cmd_on_table(self, cmd: str, table_name: str) -> Tuple[int, int]:
+        if cmd == 'truncate':
+            _get_worker_db().call_with_reconnect(lambda db: db.truncate_table(table_name))
+
+        elif cmd == 'set-serials':
+            value = self.keyspace.table_rows(table_name)
+            for column_name in self.serials[table_name]:
+                _get_worker_db().call_with_reconnect(
+                    lambda db, column_name=column_name: db.set_serial(
+                        table_name, column_name, value))
+
+        else:
+            raise ValueError(f'Unknown DB command: { cmd }')
+
+        return _get_worker_stats()
 
-            elif cmd == 'vacuum-analyze':
-                db.vacuum_analyze_table(table_name)
+    @classmethod
+    def _add_worker_stats(cls, connections: Dict[int, int],
+                          worker_stats: Iterable[Tuple[int, int]]) -> None:
+        """Keep the highest number of connections each worker reported."""
+        for pid, num_connections in worker_stats:
+            connections[pid] = max(connections.get(pid, 0), num_connections)
+
+    @classmethod
+    def _report_connections(cls, connections: Mapping[int, int]) -> None:
+        """Log how many connections the workers opened in total."""
+        logger.info(f'Opened { sum(connections.values()) } database connections '
+                    f'across { len(connections) } workers')
+
+    def _use_client_serials(self, keyspace: Type[KeySpace]) -> Dict[str, List[str]]:
+        """
+        Switch serial columns to client-side generation where the row-count
+        plan allows. Ids start at 1, so the tables must start out empty.
+        """
+        if not self.args.truncate and not self.args.resume:
+            raise ValueError('--client-serials requires --truncate or --resume, '
+                             'ids would collide with rows already in the tables')
+
+        serials = {}
+        for table_name, table in self.tables.items():
+            has_serials = any(column.pg_type in ('serial', 'bigserial')
+                              for column in table.schema.values())
+            if not has_serials:
+                continue
+
+            if table_name not in keyspace:
+                logger.warning(f'Serial columns of { table_name } are left to the server, '
+                               'its scaler is not constant')
+                continue
+
+            columns = table.use_client_serials()
+            if columns:
+                serials[table_name] = columns
+
+        return serials
+
+    @contextmanager
+    def _timed(self, phase: str) -> Iterator[None]:
+        """Record how long a phase of the run takes."""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.timings[phase] = time.monotonic() - start
+            logger.info(f'Phase { phase } took { self.timings[phase]:.1f}s')
+
+    @classmethod
+    def _report_timings(cls, timings: Mapping[str, float],
+                        task_timings: Mapping[str, float]) -> None:
+        """Log the time spent in each phase and on each maintenance task, longest first."""
+        summary = ', '.join([f'{ phase } { seconds:.1f}s' for phase, seconds in timings.items()])
+        logger.info(f'Time per phase: { summary }')
+
+        for label, seconds in sorted(task_timings.items(), key=lambda item: -item[1]):
+            logger.info(f'{ label } took { seconds:.1f}s')
+
+    def _maintenance_pool(self) -> MaintenancePool:
+        """Connections for maintenance, each using the configured maintenance settings."""
+        settings = {
+            'maintenance_work_mem': self.args.maintenance_work_mem,
+            'max_parallel_maintenance_workers': self.args.max_parallel_maintenance_workers,
+        }
+        return MaintenancePool(
+            self.args.dsn, self.args.maintenance_workers or self.args.max_parallel_workers,
+            {name: value for name, value in settings.items() if value is not None})
+
+    def _get_table_sizes(self, tables: Sequence[str]) -> Dict[str, int]:
+        with DB(self.args.dsn) as db:
+            return db.get_table_sizes(tables)
+
+    def _get_fingerprint(self, table_name: str) -> str:
+        """
+        Hash of everything the data of the table's units depends on besides
+        their seeds. Units of a previous run are only the same if it matches.
+        """
+        table = self.tables[table_name]
+        scaler = table.scaler
+        if callable(scaler):
+            scaler = f'{ scaler.__module__ }.{ scaler.__qualname__ }'
+
+        # Pipelined units are sampled chunk by chunk
+        chunk_rows = None
+        if self.args.pipeline and not table.partitioning:
+            chunk_rows = self.args.copy_chunk_rows
+
+        parts = (self.args.rows, self.args.batch_size, scaler, list(table.schema.items()),
+                 chunk_rows)
+        return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+    def _prepare_checkpoints(self) -> AbstractSet[Tuple[str, int]]:
+        """
+        Create the checkpoint table, emptied if tables are truncated. Returns
+        (table, batch_id) of the units to skip when resuming.
+        """
+        if self.args.resume and self.args.truncate:
+            raise ValueError('--resume cannot be used with --truncate')
 
-            else:
-                raise ValueError(f'Unknown DB command: { cmd }')
+        with DB(self.args.dsn) as db:
+            db.create_checkpoint_table()
+            if self.args.truncate:
+                db.truncate_table(DB.CHECKPOINT_TABLE)
+
+            checkpoints = db.get_checkpoints()
+
+        # Other shards record their units concurrently
+        checkpoints = [
+            checkpoint for checkpoint in checkpoints
+            if (checkpoint[1] - 1) % self.args.shard_count == self.args.shard_index]
+
+        if not self.args.resume:
+            if checkpoints:
+                raise ValueError(f'{ len(checkpoints) } units are checkpointed by a previous '
+                                 'run, use --resume to continue it or --truncate to start over')
+            return frozenset()
+
+        done = set()
+        for table_name, batch_id, _, fingerprint in checkpoints:
+            if fingerprint != self.fingerprints.get(table_name):
+                raise ValueError(f'Batch { batch_id } of { table_name } was generated with '
+                                 'different arguments or table definitions than this run')
+            done.add((table_name, batch_id))
+
+        logger.info(f'Resuming, { len(done) } units were loaded before')
+        return frozenset(done)
+
+    def _prepare_fast_load(self, sequence: Sequence[str]) -> FastLoad:
+        """Drop indexes and constraints of all tables, or switch them to UNLOGGED."""
+        fast_load = FastLoad(sequence, self.args.fast_load, self.args.unlogged)
+        with self._timed('prepare'), DB(self.args.dsn) as db:
+            fast_load.capture(db)
+            fast_load.prepare(db)
+
+        return fast_load
+
+    def _restore_fast_load(self, fast_load: Type[FastLoad]) -> None:
+        """Rebuild indexes and constraints of all tables in parallel."""
+        with self._timed('restore'), self._maintenance_pool() as pool:
+            sizes = self._get_table_sizes(fast_load.tables)
+            self.task_timings.update(fast_load.restore(pool, sizes))
+
+    def _vacuum(self, sequence: Sequence[str]) -> None:
+        """VACUUM and/or ANALYZE all tables in parallel, largest first."""
+        command = VACUUM_COMMANDS[self.args.vacuum_mode]
+        tasks = [(table, f'{ command } { table }', [f'{ command } { table }'])
+                 for table in sequence]
+
+        with self._timed('vacuum'), self._maintenance_pool() as pool:
+            sizes = self._get_table_sizes(sequence)
+            self.task_timings.update(pool.run(largest_first(tasks, sizes)))
 
     def run(self):
         """Main entrypoint to start the random data generator."""
+        self._check_sharding()
+        self.timings = {}
+        self.task_timings = {}
         batches = self._get_batches()
         sequence = self._generate_sequence()
+        self.keyspace = self._get_keyspace()
+        if self.args.client_serials:
+            self.serials = self._use_client_serials(self.keyspace)
 
         all_deps = set()
-        for table in self.tables.values():
+        table_deps = {}
+        for table_name, table in self.tables.items():
+            # Compile once here, workers receive the ready-made plan
+            table.get_plan()
             deps = table.get_column_dependencies()
             all_deps.update(deps)
+            table_deps[table_name] = {Cache.build_path(*dep) for dep in deps}
+
+        self.deps = frozenset(all_deps)
+        for table_name, table in self.tables.items():
+            if table.partitioning and not is_routable(table.partitioning):
+                logger.warning(f'Rows of { table_name } cannot be routed client-side, '
+                               'the server routes them to its partitions')
+
+        self._check_references(self.keyspace)
+        self.refs = self._get_references()
+        scheduler = DagScheduler(self.graph, sequence, table_deps)
+
+        shared_store = None
+        lock = None
+        if self.args.shared_cache:
+            shared_store = self._create_shared_store()
+            self.shared_specs = shared_store.specs
+            lock = multiprocessing.Lock()
+
+        self.checkpoint = self.args.checkpoint or self.args.resume
+        if self.checkpoint:
+            self.fingerprints = {
+                table_name: self._get_fingerprint(table_name) for table_name in self.tables}
+            self.done = self._prepare_checkpoints()
+
+        fast_load = None
+        if self.args.fast_load or self.args.unlogged:
+            fast_load = self._prepare_fast_load(sequence)
+
+        # Without indexes and constraints, batch 1 can truncate in its COPY transaction
+        self.freeze = self.args.fast_load and self.args.truncate
+
+        # The executor, including all table definitions, is handed to each
+        # worker once instead of with every task
+        connections: Dict[int, int] = {}
+        try:
+            with ProcessPoolExecutor(self.args.max_parallel_workers, initializer=_init_worker,
+                                     initargs=(self.args.dsn, self, lock)) as executor:
+                if self.args.truncate:
+                    tasks = [(_run_db_cmd_task, ('truncate', table)) for table in sequence
+                             if not self.freeze or self.tables[table].partitioning]
+                    Executor._add_worker_stats(
+                        connections, Executor._execute_in_parallel(executor, tasks))
+
+                try:
+                    with self._timed('load'):
+                        if self.freeze:
+                            # Other batches must not load before batch 1 truncated
+                            self._run_dag(executor, scheduler, itertools.islice(batches, 1),
+                                          connections)
+
+                        self._run_dag(executor, scheduler, batches, connections)
+
+                finally:
+                    if fast_load:
+                        self._restore_fast_load(fast_load)
+
+                if self.serials:
+                    tasks = [(_run_db_cmd_task, ('set-serials', table)) for table in self.serials]
+                    Executor._add_worker_stats(
+                        connections, Executor._execute_in_parallel(executor, tasks))
+
+            # Generation workers and their connections are gone by now
+            if self.args.vacuum_analyze:
+                self._vacuum(sequence)
 
-        with ProcessPoolExecutor(self.args.max_parallel_workers) as executor:
-            if self.args.truncate:
-                tasks = [(self._run_db_cmd_on_table, ('truncate', table)) for table in sequence]
-                Executor._execute_in_parallel(executor, tasks)
-
-            tasks = []
-            for batch_id, batch_size in batches:
-                task = (self._run_helper, (sequence, all_deps, batch_id, batch_size))
-                tasks.append(task)
-            Executor._execute_in_parallel(executor, tasks)
+        finally:
+            if shared_store:
+                shared_store.close()
+                shared_store.unlink()
 
-            if self.args.vacuum_analyze:
-                tasks = [(self._run_db_cmd_on_table, ('vacuum-analyze', table)) for table in sequence]
-                Executor._execute_in_parallel(executor, tasks)
+        Executor._report_connections(connections)
+        Executor._report_timings(self.timings, self.task_timings)
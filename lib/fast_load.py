@@ -0,0 +1,138 @@
+"""
+This module removes indexes, constraints and WAL-logging from tables during
+ingestion and restores them afterwards.
+"""
+
+from typing import Dict, List, Mapping, Sequence, Tuple, Type
+
+from loguru import logger
+
+from lib.db import DB
+from lib.maintenance import MaintenancePool, largest_first
+
+
+class FastLoad:
+    """
+    Captures the index and constraint definitions of the target tables, drops
+    them before ingestion and rebuilds them in parallel afterwards. Optionally,
+    tables are switched to UNLOGGED during ingestion.
+    """
+
+    tables: List[str]
+    # (table, name, definition)
+    indexes: List[Tuple[str, str, str]]
+    # (table, name, type, definition), type as in pg_constraint.contype
+    constraints: List[Tuple[str, str, str, str]]
+
+    def __init__(self, tables: Sequence[str], drop_indexes: bool = True,
+                 unlogged: bool = False):
+        self.tables = list(tables)
+        self.drop_indexes = drop_indexes
+        self.unlogged = unlogged
+        self.indexes = []
+        self.constraints = []
+
+    def capture(self, db: Type[DB]) -> None:
+        """
+        Read the definitions of all indexes and constraints to drop. Tables
+        can only be switched to UNLOGGED without foreign keys to or from
+        logged tables, so foreign keys are dropped with unlogged alone as well.
+        """
+        if not self.drop_indexes and not self.unlogged:
+            return
+
+        seen = set()
+        for table in self.tables:
+            # Indexes of partitioned tables are defined ON ONLY the parent,
+            # recreate them on the partitions as well
+            if self.drop_indexes:
+                self.indexes += [(table, name, definition.replace(' ON ONLY ', ' ON ', 1))
+                                 for name, definition in db.get_indexes(table)]
+
+            # Foreign keys show up for both tables they connect
+            for constraint in db.get_constraints(table):
+                if not self.drop_indexes and constraint[2] != 'f':
+                    continue
+
+                if constraint[:2] not in seen:
+                    seen.add(constraint[:2])
+                    self.constraints.append(constraint)
+
+        logger.info(f'Captured { len(self.indexes) } indexes and '
+                    f'{ len(self.constraints) } constraints')
+
+    def _foreign_keys(self) -> List[Tuple[str, str, str, str]]:
+        return [constraint for constraint in self.constraints if constraint[2] == 'f']
+
+    def _unique_keys(self) -> List[Tuple[str, str, str, str]]:
+        return [constraint for constraint in self.constraints if constraint[2] != 'f']
+
+    def prepare_statements(self) -> List[str]:
+        """
+        Statements to run before ingestion. Foreign keys are dropped first,
+        as they depend on the unique indexes of the referenced tables.
+        """
+        statements = [
+            f'ALTER TABLE { table } DROP CONSTRAINT "{ name }"'
+            for table, name, _, _ in self._foreign_keys() + self._unique_keys()
+        ]
+        statements += [f'DROP INDEX { name }' for _, name, _ in self.indexes]
+
+        if self.unlogged:
+            statements += [f'ALTER TABLE { table } SET UNLOGGED' for table in self.tables]
+
+        return statements
+
+    def restore_waves(self, sizes: Mapping[str, int] = None) -> List[List[Tuple[str, List[str]]]]:
+        """
+        Tasks of (label, statements) to run after ingestion, in waves. The
+        tasks of a wave run in parallel, those of the largest tables first.
+        Indexes are built while tables are still unlogged, foreign keys are
+        added last as they need the unique indexes and may only reference
+        logged tables if their table is logged.
+        """
+        indexes: Dict[str, List[str]] = {}
+        for table, name, _, definition in self._unique_keys():
+            indexes.setdefault(table, []).append(
+                f'ALTER TABLE { table } ADD CONSTRAINT "{ name }" { definition }')
+
+        tasks = [(table, f'{ table } constraints', statements)
+                 for table, statements in indexes.items()]
+        tasks += [(table, f'{ table } index { name }', [definition])
+                  for table, name, definition in self.indexes]
+
+        waves = [tasks]
+        if self.unlogged:
+            waves.append([(table, f'{ table } logged', [f'ALTER TABLE { table } SET LOGGED'])
+                          for table in self.tables])
+
+        waves.append([(table, f'{ table } foreign key { name }',
+                       [f'ALTER TABLE { table } ADD CONSTRAINT "{ name }" { definition }'])
+                      for table, name, _, definition in self._foreign_keys()])
+
+        return [largest_first(wave, sizes or {}) for wave in waves if wave]
+
+    def prepare(self, db: Type[DB]) -> None:
+        """Drop indexes and constraints, and switch tables to UNLOGGED."""
+        for statement in self.prepare_statements():
+            logger.info(f'Running { statement }')
+            db.cur.execute(statement)
+
+    def restore(self, pool: Type[MaintenancePool],
+                sizes: Mapping[str, int] = None) -> Dict[str, float]:
+        """Rebuild everything dropped by prepare, returns the seconds each task took."""
+        timings = {}
+        waves = self.restore_waves(sizes)
+        for idx, wave in enumerate(waves):
+            try:
+                timings.update(pool.run(wave))
+
+            except Exception:
+                # Let the user finish the job by hand
+                remaining = [statement for tasks in waves[idx:]
+                             for _, statements in tasks for statement in statements]
+                logger.error('Restoring tables failed, statements left to run:\n'
+                             + ';\n'.join(remaining))
+                raise
+
+        return timings
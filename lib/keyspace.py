@@ -0,0 +1,118 @@
+"""
+This module derives the keys of generated rows from the row-count plan.
+"""
+
+import math
+
+from collections import namedtuple
+from typing import Any, Dict, Mapping, Optional, Tuple, Type
+
+import numpy as np
+
+
+# Keys of a single unit: `first` is the position of its first row, `parents`
+# maps referenced columns to (start, stop, key generator), the [start, stop)
+# range being the positions of their table's rows in the same batch.
+UnitKeys = namedtuple('UnitKeys', ['first', 'parents'])
+
+# Constants xor-ed into the positions before mixing
+MIX_KEY_32 = 0x5bd1e995
+MIX_KEY_64 = 0x2545f4914f6cdd1d
+
+
+def mix_int4(positions: np.ndarray) -> np.ndarray:
+    """
+    Map positions to random-looking int4 keys. Each step of the mix is
+    invertible modulo 2^32, so distinct positions never share a key.
+    """
+    keys = np.asarray(positions).astype(np.uint32) ^ np.uint32(MIX_KEY_32)
+    keys ^= keys >> np.uint32(16)
+    keys *= np.uint32(0x85ebca6b)
+    keys ^= keys >> np.uint32(13)
+    keys *= np.uint32(0xc2b2ae35)
+    keys ^= keys >> np.uint32(16)
+    return keys.view(np.int32)
+
+
+def mix_int8(positions: np.ndarray) -> np.ndarray:
+    """Like mix_int4 for int8 keys, modulo 2^64."""
+    keys = np.asarray(positions).astype(np.uint64) ^ np.uint64(MIX_KEY_64)
+    keys ^= keys >> np.uint64(30)
+    keys *= np.uint64(0xbf58476d1ce4e5b9)
+    keys ^= keys >> np.uint64(27)
+    keys *= np.uint64(0x94d049bb133111eb)
+    keys ^= keys >> np.uint64(31)
+    return keys.view(np.int64)
+
+
+# Generators deriving keys from row positions, with the mapping they apply
+KEY_MIXES = {
+    'row_id': None,
+    'unique_int4': mix_int4,
+    'unique_int8': mix_int8,
+}
+
+# Generators producing values from row positions, the first argument they
+# receive is the position of the first row
+POSITIONAL_GENERATORS = (*KEY_MIXES, 'timeseries')
+
+# How many distinct keys a key generator can produce
+KEY_LIMITS = {
+    'unique_int4': 2 ** 32,
+}
+
+
+class KeySpace:
+    """
+    Row-count plan of all tables with a constant scaler. Every batch but the
+    last one has the same size, so where the rows of a (table, batch) start
+    within the table is known upfront, without generating any data.
+    Keys start at 1.
+    """
+
+    scalers: Dict[str, float]
+
+    def __init__(self, scalers: Mapping[str, Any], total_rows: int, batch_size: int):
+        self.scalers = {table: scaler for table, scaler in scalers.items()
+                        if isinstance(scaler, (int, float))}
+        self.total_rows = total_rows
+        self.batch_size = batch_size
+
+    def __contains__(self, table_name: str) -> bool:
+        return table_name in self.scalers
+
+    def _get_batch_size(self, batch_id: int) -> int:
+        start = (batch_id - 1) * self.batch_size
+        return min(self.batch_size, self.total_rows - start)
+
+    def num_rows(self, table_name: str, batch_size: int) -> int:
+        """Rows generated for a table in a batch of batch_size rows."""
+        return max(1, math.ceil(batch_size * self.scalers[table_name]))
+
+    def key_range(self, table_name: str, batch_id: int) -> Tuple[int, int]:
+        """The [start, stop) range of keys a table has in a batch."""
+        start = (batch_id - 1) * self.num_rows(table_name, self.batch_size) + 1
+        return start, start + self.num_rows(table_name, self._get_batch_size(batch_id))
+
+    def table_rows(self, table_name: str) -> Optional[int]:
+        """Rows generated for a table over all batches, None if not known upfront."""
+        if table_name not in self:
+            return None
+
+        num_batches = math.ceil(self.total_rows / self.batch_size)
+        return self.key_range(table_name, num_batches)[1] - 1
+
+    def unit_keys(self, table_name: str, batch_id: int,
+                  parents: Mapping[str, str] = None) -> Type[UnitKeys]:
+        """
+        Keys of a unit and of the parent rows it references, parents maps
+        column paths to the name of their key generator.
+        """
+        first = None
+        if table_name in self:
+            first = self.key_range(table_name, batch_id)[0]
+
+        return UnitKeys(first, {
+            path: (*self.key_range(path.rpartition('.')[0], batch_id), key_gen)
+            for path, key_gen in (parents or {}).items()
+        })
@@ -0,0 +1,116 @@
+"""
+This module runs maintenance statements, e.g., index builds or VACUUM, in
+parallel.
+"""
+
+import threading
+import time
+
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Mapping, Sequence, Tuple
+
+from loguru import logger
+
+from lib.db import DB
+
+
+VACUUM_COMMANDS = {
+    'vacuum-analyze': 'VACUUM ANALYZE',
+    'analyze': 'ANALYZE',
+    'vacuum-freeze': 'VACUUM (FREEZE, ANALYZE)',
+}
+
+
+def largest_first(tasks: Sequence[Tuple[str, str, Sequence[str]]],
+                  sizes: Mapping[str, int]) -> List[Tuple[str, Sequence[str]]]:
+    """
+    Order tasks of (table, label, statements) by the size of their table,
+    largest first, so the longest tasks do not start last. Returns tasks of
+    (label, statements).
+    """
+    ordered = sorted(tasks, key=lambda task: -sizes.get(task[0], 0))
+    return [(label, statements) for _, label, statements in ordered]
+
+
+class MaintenancePool:
+    """
+    Threads running statements in parallel, each thread on its own database
+    connection which is kept for all tasks the thread runs. The work is I/O
+    bound on the server, so threads suffice. Settings, e.g.,
+    maintenance_work_mem, are applied to each connection.
+    """
+
+    def __init__(self, dsn: str, max_workers: int, settings: Mapping[str, Any] = None):
+        self.dsn = dsn
+        self.max_workers = max(1, max_workers)
+        self.settings = settings or {}
+        self._executor = ThreadPoolExecutor(self.max_workers)
+        self._local = threading.local()
+        self._dbs: List[DB] = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, typ, value, traceback):
+        self.close()
+
+    def _get_db(self) -> DB:
+        db = getattr(self._local, 'db', None)
+        if db is None:
+            db = DB(self.dsn)
+            db.connect()
+            self._local.db = db
+            with self._lock:
+                self._dbs.append(db)
+
+        return db
+
+    def _run_statement(self, db: DB, statement: str) -> None:
+        # A reconnect loses the settings of the previous connection
+        if getattr(self._local, 'configured', None) != db.connections:
+            db.set_settings(self.settings)
+            self._local.configured = db.connections
+
+        db.cur.execute(statement)
+
+    def _execute(self, label: str, statements: Sequence[str]) -> float:
+        start = time.monotonic()
+        for statement in statements:
+            logger.info(f'Running { statement }')
+            self._get_db().call_with_reconnect(
+                lambda db, statement=statement: self._run_statement(db, statement))
+
+        return time.monotonic() - start
+
+    def run(self, tasks: Sequence[Tuple[str, Sequence[str]]]) -> Dict[str, float]:
+        """
+        Run tasks of (label, statements) in parallel, the statements of a
+        task one after another. Tasks start in the given order. Returns the
+        seconds each task took. All tasks are run even if some fail, the
+        first error is raised at the end.
+        """
+        timings = {}
+        errors = []
+        futures = [(label, self._executor.submit(self._execute, label, statements))
+                   for label, statements in tasks]
+
+        for label, future in futures:
+            try:
+                timings[label] = future.result()
+            except Exception as exc:
+                logger.error(f'Maintenance of { label } failed: { exc }')
+                errors.append(exc)
+
+        if errors:
+            raise errors[0]
+
+        return timings
+
+    def close(self) -> None:
+        """Stop all threads and close their connections."""
+        self._executor.shutdown()
+        for db in self._dbs:
+            db.close()
+
+        self._dbs = []
@@ -0,0 +1,111 @@
+"""
+This module routes the rows of a batch to the partitions of a partitioned
+table client-side, so that each partition can be ingested into directly.
+"""
+
+from typing import Any, List, Sequence, Tuple, Type
+
+import numpy as np
+
+from loguru import logger
+
+from lib.batch import Batch
+from lib.schema_parser import Partitioning
+
+
+# Range bounds are only compared for these kinds, strings would need the
+# collation of the key column
+RANGE_KINDS = ('i', 'u', 'f', 'M')
+
+
+def is_routable(partitioning: Type[Partitioning]) -> bool:
+    """
+    Whether rows can be routed client-side. Hash partitioning would need the
+    server's hash functions, keys of multiple columns or of expressions are
+    not supported.
+    """
+    return (partitioning.strategy in ('range', 'list') and len(partitioning.columns) == 1
+            and partitioning.columns[0] is not None and bool(partitioning.partitions))
+
+
+def _to_dtype(values: Sequence[Any], dtype: np.dtype) -> np.ndarray:
+    if dtype.kind in RANGE_KINDS:
+        return np.array(values).astype(dtype)
+
+    return np.array(values, dtype=object)
+
+
+def _get_masks(partitioning: Type[Partitioning], values: np.ndarray,
+               nulls: np.ndarray) -> List[Tuple[str, np.ndarray]]:
+    masks = []
+    for partition in partitioning.partitions:
+        if partition.is_default:
+            continue
+
+        if partitioning.strategy == 'list':
+            listed = [value for value in partition.values if value is not None]
+            mask = np.isin(values, _to_dtype(listed, values.dtype)) & ~nulls
+            if None in partition.values:
+                mask |= nulls
+
+        else:
+            mask = ~nulls
+            lower, upper = partition.lower[0], partition.upper[0]
+            if lower is not None:
+                mask &= values >= _to_dtype([lower], values.dtype)[0]
+            if upper is not None:
+                mask &= values < _to_dtype([upper], values.dtype)[0]
+
+        masks.append((partition.name, mask))
+
+    return masks
+
+
+def route_batch(table_name: str, partitioning: Type[Partitioning], batch: Type[Batch],
+                offset: int = 0) -> List[Tuple[str, Type[Batch]]]:
+    """
+    Split a batch into one batch per partition. Rows matching no partition
+    go to the default partition, if any, else to the table itself, as do all
+    rows if they cannot be routed client-side. Partitions are rotated by
+    offset, so that concurrent callers start with different partitions.
+    """
+    key = partitioning.columns[0]
+    if not is_routable(partitioning) or key not in batch.columns:
+        return [(table_name, batch)]
+
+    values = batch.columns[key]
+    if not isinstance(values, np.ndarray):
+        values = np.array(values, dtype=object)
+
+    nulls = batch.nulls.get(key)
+    if nulls is None:
+        nulls = np.zeros(len(batch), dtype=bool)
+
+    if partitioning.strategy == 'range' and values.dtype.kind not in RANGE_KINDS:
+        return [(table_name, batch)]
+
+    try:
+        masks = _get_masks(partitioning, values, nulls)
+    except (TypeError, ValueError) as exc:
+        logger.warning(f'Cannot route rows of { table_name } to its partitions: { exc }')
+        return [(table_name, batch)]
+
+    routed = np.zeros(len(batch), dtype=bool)
+    targets = []
+    for name, mask in masks:
+        mask &= ~routed
+        routed |= mask
+        targets.append((name, mask))
+
+    default = next(
+        (partition.name for partition in partitioning.partitions if partition.is_default),
+        table_name)
+    targets.append((default, ~routed))
+
+    targets = [(name, batch.take(np.flatnonzero(mask)))
+               for name, mask in targets if mask.any()]
+    if not targets:
+        return []
+
+    offset %= len(targets)
+    return targets[offset:] + targets[:offset]
@@ -0,0 +1,111 @@
+"""
+This module overlaps data generation with ingestion into the database.
+"""
+
+import queue
+import threading
+
+from typing import Iterator, Mapping, Tuple, Type
+
+from loguru import logger
+
+from lib.batch import Batch
+from lib.db import DB
+from lib.table import Column
+
+
+class PipelineAborted(Exception):
+    """Raised inside the ingestion thread when the producer gave up."""
+
+
+class IngestPipeline(threading.Thread):
+    """
+    Background thread streaming generated batches to the database while the
+    caller generates the next ones. Tables are ingested strictly in the order
+    they were begun, one COPY per table. The queue between caller and thread is
+    bounded, so at most queue_size batches wait for ingestion at any time.
+    """
+
+    _END = object()
+    _ABORT = object()
+    _SHUTDOWN = object()
+
+    def __init__(self, db: Type[DB], copy_format: str, chunk_rows: int, queue_size: int = 2):
+        super().__init__(daemon=True)
+        self._db = db
+        self._copy_format = copy_format
+        self._chunk_rows = chunk_rows
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._error = None
+
+    def _batches(self) -> Iterator[Batch]:
+        while True:
+            item = self._queue.get()
+            if item is IngestPipeline._END:
+                return
+
+            if item is IngestPipeline._ABORT:
+                raise PipelineAborted('Data generation failed')
+
+            yield item
+
+    def _drain(self) -> None:
+        while self._queue.get() is not IngestPipeline._SHUTDOWN:
+            pass
+
+    def run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is IngestPipeline._SHUTDOWN:
+                return
+
+            if item is IngestPipeline._ABORT:
+                continue
+
+            table_name, schema, truncate, checkpoint = item
+            try:
+                logger.info(f'Streaming into { table_name }')
+                self._db.ingest_batches(table_name, schema, self._batches(),
+                                        self._copy_format, self._chunk_rows, truncate,
+                                        checkpoint)
+
+            except Exception as exc:
+                # Keep consuming so the producer never blocks on a full queue
+                self._error = exc
+                self._drain()
+                return
+
+    def _raise_error(self) -> None:
+        if self._error:
+            raise self._error
+
+    def begin(self, table_name: str, schema: Mapping[str, Type[Column]],
+              truncate: bool = False,
+              checkpoint: Tuple[str, int, int, str] = None) -> None:
+        """
+        Start ingesting into a new table, optionally truncating it and
+        recording a checkpoint in the same transaction.
+        """
+        self._raise_error()
+        self._queue.put((table_name, schema, truncate, checkpoint))
+
+    def put(self, batch: Type[Batch]) -> None:
+        """Queue a batch of the current table, blocks while the queue is full."""
+        self._raise_error()
+        self._queue.put(batch)
+
+    def end(self) -> None:
+        """Finish the current table."""
+        self._queue.put(IngestPipeline._END)
+
+    def abort(self) -> None:
+        """Abort the current table, its COPY is rolled back, and stop the thread."""
+        self._queue.put(IngestPipeline._ABORT)
+        self._queue.put(IngestPipeline._SHUTDOWN)
+        self.join()
+
+    def close(self) -> None:
+        """Wait for all queued data to be ingested and raise any ingestion error."""
+        self._queue.put(IngestPipeline._SHUTDOWN)
+        self.join()
+        self._raise_error()
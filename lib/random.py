@@ -1,18 +1,23 @@
 
-import hashlib
 import random
+import string
 
 from datetime import timedelta
-from uuid import uuid4
+from uuid import UUID
 
-import mimesis.random as mimesis_random
 import numpy as np
 
 from mimesis.schema import Field
 from mimesis.enums import Algorithm
 from numpy.random import default_rng
 
+from .keyspace import KEY_MIXES, mix_int4, mix_int8
 from .random_data import RandomData
+from .word_pool import get_word_pool
+
+
+# Positions of the hex digits within the string representation of a UUID
+UUID_DIGITS = [idx for idx in range(36) if idx not in (8, 13, 18, 23)]
 
 
 class Random:
@@ -34,6 +39,11 @@ class Random:
         ] for code in range(this_range[0], this_range[1] + 1)
     ]
 
+    # Alphabets as code points, strings are drawn from them a column at a time
+    UTF8_CODES = np.array([ord(char) for char in UTF8_ALPHABET], dtype=np.uint32)
+    STRING_CODES = np.array([ord(char) for char in string.ascii_letters + string.digits],
+                            dtype=np.uint32)
+
     def __init__(self, seed=0):
         self.seed = seed
         self.rng = default_rng(seed=seed)
@@ -57,33 +67,56 @@ class Random:
     def _int_to_granularity(cls, value, granularity):
         return int(int(value / granularity) * granularity)
 
-    def whole_number(self, start, end, granularity=1):
+    @classmethod
+    def _ints_to_granularity(cls, values, granularity):
+        if granularity == 1:
+            return values
+
+        # np.fmod truncates towards zero just like int() does
+        return values - np.fmod(values, granularity)
+
+    def whole_number(self, start, end, granularity=1, size=None):
         """Produce a random whole number with the given granularity."""
-        number = self.field('integer_number', start=start, end=end)
-        return Random._int_to_granularity(number, granularity)
+        if size is None:
+            number = self.field('integer_number', start=start, end=end)
+            return Random._int_to_granularity(number, granularity)
+
+        numbers = self.rng.integers(start, end, size=size, dtype=np.int64, endpoint=True)
+        return Random._ints_to_granularity(numbers, granularity)
 
-    def whole_number_lognormal(self, mean, median, granularity=1, upper_limit=None):
+    def whole_number_lognormal(self, mean, median, granularity=1, upper_limit=None,
+                               size=None):
         """Produce a random log-normal distributed number."""
-        number = self.sample_income(mean, median)[0]
-        number = Random._int_to_granularity(number, granularity)
+        if size is None:
+            number = self.sample_income(mean, median)[0]
+            number = Random._int_to_granularity(number, granularity)
 
-        return min(number, upper_limit) if upper_limit else number
+            return min(number, upper_limit) if upper_limit else number
 
-    def bool_sample(self, probability_true, size=1):
+        numbers = np.array(self.sample_income(mean, median, samples=size), dtype=np.int64)
+        numbers = Random._ints_to_granularity(numbers, granularity)
+
+        return np.minimum(numbers, upper_limit) if upper_limit else numbers
+
+    def bool_sample(self, probability_true, size=None):
         """Produce true/false with a given probability of true."""
-        if size == 1:
-            return self.rng.binomial(1, probability_true, size=size)[0] == 1
+        if size is None:
+            return self.rng.binomial(1, probability_true, size=1)[0] == 1
 
         return self.rng.binomial(1, probability_true, size=size) == 1
 
-    def fraction(self, start, end, granularity):
+    def fraction(self, start, end, granularity, size=None):
         """Get a fraction within bounds."""
         number = self.whole_number(start * granularity, end * granularity,
-                                   granularity=granularity)
+                                   granularity=granularity, size=size)
         return number / granularity
 
-    def employment(self):
+    def employment(self, size=None):
         """Employment categories with a fixed probability."""
+        if size is not None:
+            return np.array(['UNEMPLOYED', 'SELF EMPLOYED', 'EMPLOYED'])[
+                np.searchsorted([0.05, 0.15], self.rng.random(size=size))]
+
         sample = self.rng.random()
         if sample <= 0.05:
             return 'UNEMPLOYED'
@@ -93,8 +126,11 @@ class Random:
 
         return 'EMPLOYED'
 
-    def num_children(self):
+    def num_children(self, size=None):
         """Number of children with fixed probabilities."""
+        if size is not None:
+            return np.searchsorted([0.1, 0.65, 0.85], self.rng.random(size=size))
+
         sample = self.rng.random()
         if sample <= 0.1:
             return 0
@@ -107,89 +143,242 @@ class Random:
 
         return 3
 
-    def uuid(self):
+    @classmethod
+    def _to_hex(cls, raw, width):
+        """Format raw bytes as hex strings of width characters each."""
+        return np.frombuffer(raw.hex().encode('ascii'), dtype=f'S{ width }').astype(f'U{ width }')
+
+    def _random_uuid_bytes(self, num_values):
+        """Draw random UUID4s as an array of 16 bytes each."""
+        raw = np.frombuffer(bytearray(self.rng.bytes(16 * num_values)),
+                            dtype=np.uint8).reshape(-1, 16)
+        raw[:, 6] = (raw[:, 6] & 0x0f) | 0x40
+        raw[:, 8] = (raw[:, 8] & 0x3f) | 0x80
+        return raw
+
+    def uuid(self, size=None):
         """Returns a UUID4"""
-        return uuid4()
+        if size is None:
+            return UUID(bytes=self._random_uuid_bytes(1).tobytes())
+
+        digits = np.frombuffer(self._random_uuid_bytes(size).tobytes().hex().encode('ascii'),
+                               dtype=np.uint8).reshape(-1, 32)
 
-    def words(self, num_words):
+        # Insert the dashes of 8-4-4-4-12 groups of hex digits
+        chars = np.full((size, 36), ord('-'), dtype=np.uint8)
+        chars[:, UUID_DIGITS] = digits
+        return chars.view('S36').ravel().astype('U36')
+
+    def words(self, num_words, size=None):
         """Returns a space-joined string of random words."""
-        return ' '.join(self.field('words', quantity=num_words))
+        if size is None:
+            return str(get_word_pool().texts(self.rng, [num_words])[0])
+
+        return get_word_pool().texts(self.rng, np.broadcast_to(num_words, (size,)))
 
-    def interest_rate(self, requested_interest):
+    def interest_rate(self, requested_interest, size=None):
         """Get a banks interest rate for some loan.
 
         Based on the requested interest with a margin added.
         """
+        if size is not None:
+            margins = np.round(np.minimum(self.rng.lognormal(mean=0.05, size=size), 2.0), 2)
+            return requested_interest + margins
+
         interest_margin = round(min(self.rng.lognormal(mean=0.05), 2.0), 2)
         return requested_interest + interest_margin
 
-    def uniform(self, start, end, precision=2):
+    def uniform(self, start, end, precision=2, size=None):
         """Get a uniform distributed random float number within limits."""
+        if size is not None:
+            return np.round(self.rng.uniform(start, end, size=size), precision)
+
         return round(self.rng.uniform(start, end), precision)
 
-    def random_text(self, min_words, max_words):
+    def random_text(self, min_words, max_words, size=None):
         """Get random text with min/max amount of words."""
-        return self.words(self.whole_number(min_words, max_words, 1))
+        if size is None:
+            return self.words(self.whole_number(min_words, max_words, 1))
+
+        num_words = self.whole_number(min_words, max_words, 1, size=size)
+        return get_word_pool().texts(self.rng, num_words)
 
-    def add_processing_time(self, base, mean_time):
+    def add_processing_time(self, base, mean_time, size=None):
         """Return processing time a bank has. Units are minutes."""
+        if size is not None:
+            micros = self.rng.exponential(scale=mean_time * 60e6, size=size)
+            return np.asarray(base, dtype='datetime64[us]') + micros.astype('timedelta64[us]')
+
         delta = timedelta(minutes=self.rng.exponential(scale=mean_time))
         return base + delta
 
-    def unicode(self, length):
+    def _strings(self, codes, lengths):
+        """
+        Draw strings of the given lengths from an alphabet of code points. All
+        code points are drawn at once into a buffer, which is then viewed as
+        an array of strings.
+        """
+        lengths = np.asarray(lengths, dtype=np.int64)
+        width = max(1, int(lengths.max(initial=0)))
+
+        # Code points behind the end of a string stay zero, which terminates it
+        buffer = np.zeros((len(lengths), width), dtype=np.uint32)
+        buffer[np.arange(width) < lengths[:, None]] = codes[
+            self.rng.integers(0, len(codes), size=int(lengths.sum()))]
+
+        return buffer.view(f'U{ width }').ravel()
+
+    def unicode(self, length, size=None):
         """Returns randomized UTF-8 characters of any length."""
-        return ''.join(self.rng.choice(Random.UTF8_ALPHABET) for _ in range(length))
+        if size is None:
+            return str(self._strings(Random.UTF8_CODES, [length])[0])
+
+        return self._strings(Random.UTF8_CODES, np.full(size, length))
 
     def mimesis(self, what):
         """Returns X from mimesis."""
         return self.field(what)
 
-    def md5(self):
+    def md5(self, size=None):
         """Returns random md5 string."""
-        data_md5 = hashlib.new('md5', self.uuid().bytes, usedforsecurity=False)
-        return data_md5.hexdigest()
+        if size is None:
+            return self.rng.bytes(16).hex()
+
+        # Digests of random data are random, thus skip hashing
+        return Random._to_hex(self.rng.bytes(16 * size), 32)
 
     def choose_from_list(self, choices, picks=None, probs=None):
         """Returns a choice from a provided list."""
+        if picks is not None and probs is None and isinstance(choices, np.ndarray):
+            # Draw indices only, avoids copying the choices on every call
+            if not len(choices) and picks:
+                raise ValueError('Cannot choose from an empty list')
+
+            return choices[self.rng.integers(0, len(choices), size=picks)]
+
         values = self.rng.choice(choices, size=picks, p=probs)
         return values
 
+    def row_id(self, start, size=None):
+        """Returns consecutive keys beginning at start."""
+        if size is None:
+            return start
+
+        return np.arange(start, start + size, dtype=np.int64)
+
+    def unique_int4(self, start, size=None):
+        """Returns unique, random-looking int4 keys for the rows beginning at start."""
+        if size is None:
+            return int(mix_int4(np.array([start]))[0])
+
+        return mix_int4(np.arange(start, start + size, dtype=np.int64))
+
+    def unique_int8(self, start, size=None):
+        """Returns unique, random-looking int8 keys for the rows beginning at start."""
+        if size is None:
+            return int(mix_int8(np.array([start]))[0])
+
+        return mix_int8(np.arange(start, start + size, dtype=np.int64))
+
+    def ref(self, start, stop, key_gen='row_id', size=None):
+        """Returns random keys of the rows [start, stop) as generated by key_gen."""
+        num_keys = 1 if size is None else size
+        positions = self.rng.integers(start, stop, size=num_keys, dtype=np.int64)
+        mix = KEY_MIXES[key_gen]
+        keys = mix(positions) if mix else positions
+
+        if size is None:
+            return int(keys[0])
+
+        return keys
+
     def data(self, uuid, data_type, serialization_type, length):
         """Get random data."""
         return RandomData(self, uuid, data_type, serialization_type, length)
 
-    def string(self, length):
+    def json(self, size=None):
+        """Get random JSON documents."""
+        documents = RandomData.render_batch(self, 'data', 'json', 1 if size is None else size)
+        return documents[0] if size is None else documents
+
+    def jsonb(self, size=None):
+        return self.json(size=size)
+
+    def xml(self, size=None):
+        """Get random XML documents."""
+        documents = RandomData.render_batch(self, 'data', 'xml', 1 if size is None else size)
+        return documents[0] if size is None else documents
+
+    def string(self, length=None, size=None):
         """Generate a random string of length between min & max chars."""
-        return mimesis_random.random.randstr(length=length)
+        num_values = 1 if size is None else size
+        if length is None:
+            lengths = self.rng.integers(16, 128, size=num_values, endpoint=True)
+        else:
+            lengths = np.full(num_values, length)
+
+        values = self._strings(Random.STRING_CODES, lengths)
+        return str(values[0]) if size is None else values
+
+    def varchar(self, max_chars=255, size=None):
+        if size is None:
+            return self.string(self.whole_number(1, max_chars))
+
+        lengths = self.whole_number(1, max_chars, size=size)
+        return self._strings(Random.STRING_CODES, lengths)
 
-    def varchar(self, max_chars=255):
-        length = self.whole_number(1, max_chars)
-        return self.string(length)
+    def text(self, size=None):
+        return self.random_text(5, 100, size=size)
 
-    def text(self):
-        return self.random_text(5, 100)
+    def int2(self, size=None):
+        return self.whole_number(-32768, 32767, size=size)
 
-    def int2(self):
-        return self.whole_number(-32768, 32767)
+    def int4(self, size=None):
+        return self.whole_number(-2147483648, 2147483646, size=size)
 
-    def int4(self):
-        return self.whole_number(-2147483648, 2147483646)
+    def int8(self, size=None):
+        return self.whole_number(-9223372036854775808, 9223372036854775806, size=size)
 
-    def int8(self):
-        return self.whole_number(-9223372036854775808, 9223372036854775806)
+    def _datetimes(self, start, end, unit, size):
+        """Uniformly distributed datetime64 values from the years start to end."""
+        first = np.datetime64(f'{ start }-01-01', unit)
+        stop = np.datetime64(f'{ end + 1 }-01-01', unit)
+        offsets = self.rng.integers(0, (stop - first).astype(np.int64), size=size)
+        return first + offsets.astype(f'timedelta64[{ unit }]')
 
-    def timestamp(self):
-        return self.mimesis('datetime')
+    def timestamp(self, start=2000, end=2025, size=None):
+        if size is None:
+            return self._datetimes(start, end, 'us', 1)[0].item()
 
-    def timestamptz(self):
-        return self.timestamp()
+        return self._datetimes(start, end, 'us', size)
+
+    def timestamptz(self, start=2000, end=2025, size=None):
+        return self.timestamp(start, end, size=size)
+
+    def date(self, start=2000, end=2025, size=None):
+        if size is None:
+            return self._datetimes(start, end, 'D', 1)[0].item()
+
+        return self._datetimes(start, end, 'D', size)
+
+    def timeseries(self, first, start='2020-01-01', step=1, jitter=0, size=None):
+        """
+        Timestamps of the rows beginning at position first, step seconds apart,
+        for append-only tables. Each one is delayed by up to jitter seconds,
+        they keep increasing as long as jitter is below step.
+        """
+        num_values = 1 if size is None else size
+        positions = np.arange(first - 1, first - 1 + num_values, dtype=np.int64)
+        micros = positions * int(step * 1e6)
+        if jitter:
+            micros += self.rng.integers(0, int(jitter * 1e6), size=num_values)
 
-    def date(self):
-        return self.mimesis('date')
+        values = np.datetime64(start, 'us') + micros.astype('timedelta64[us]')
+        return values[0].item() if size is None else values
 
-    def numeric(self, precision, scale):
+    def numeric(self, precision, scale, size=None):
         # Note: do precision correctly
-        return self.fraction(-1000, 1000, scale)
+        return self.fraction(-1000, 1000, scale, size=size)
 
-    def bpchar(self, length):
-        return self.string(length)
+    def bpchar(self, length=None, size=None):
+        return self.string(length, size=size)
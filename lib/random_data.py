@@ -1,6 +1,37 @@
 
 import json
 from uuid import UUID
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from .word_pool import WordPool, get_word_pool
+
+
+# Document templates, the values are inserted in place of the {} fields.
+# Static parts are rendered once, values are escaped before insertion.
+JSON_TEMPLATE = '{{"id": "{}", "type": "{}", "data": {{"response": "{}"}}, "binary": ""}}'
+XML_TEMPLATE = ('<?xml version="1.0" encoding="UTF-8" ?>'
+                '<root><id>{}</id><type>{}</type><data><response>{}</response></data>'
+                '<binary><![CDATA[]]></binary></root>')
+
+ESCAPES = {
+    'json': lambda value: json.dumps(value)[1:-1],
+    'xml': escape,
+}
+
+_escaped_pools = {}
+
+
+def _get_escaped_pool(serialization_type):
+    """The vocabulary with all words escaped for the serialization type, once per process."""
+    if serialization_type not in _escaped_pools:
+        words = get_word_pool().words.tolist()
+        _escaped_pools[serialization_type] = WordPool(
+            [ESCAPES[serialization_type](word) for word in words])
+
+    return _escaped_pools[serialization_type]
+
 
 class RandomData:
     def __init__(self, rnd, uuid, data_type, serialization_type, binary_length):
@@ -14,6 +45,31 @@ class RandomData:
         }
         self.serialization_type = serialization_type
 
+    @classmethod
+    def render_batch(cls, rnd, data_type, serialization_type, size, min_words=100,
+                     max_words=1000):
+        """
+        Render size documents at once. Equivalent to RandomData, but the
+        response texts of all documents are drawn from an escaped vocabulary
+        at once and inserted into a precompiled template.
+        """
+        if serialization_type == 'json':
+            template = JSON_TEMPLATE
+            ids = rnd.md5(size=size)
+        elif serialization_type == 'xml':
+            template = XML_TEMPLATE
+            ids = rnd.uuid(size=size)
+        else:
+            raise ValueError(f'Unknown serialization type: { serialization_type }')
+
+        data_type = ESCAPES[serialization_type](str(data_type))
+        num_words = rnd.whole_number(min_words, max_words, 1, size=size)
+        responses = _get_escaped_pool(serialization_type).texts(rnd.rng, num_words)
+
+        return np.array([template.format(doc_id, data_type, response)
+                         for doc_id, response in zip(ids.tolist(), responses.tolist())],
+                        dtype=object)
+
     def __str__(self):
         if self.serialization_type == 'json':
             return self.to_json()
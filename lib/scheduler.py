@@ -0,0 +1,107 @@
+"""
+This module schedules (table, batch) units along the dependency graph.
+"""
+
+from collections import namedtuple
+from typing import AbstractSet, Any, Dict, List, Mapping, Sequence, Set
+
+import numpy as np
+
+
+# A single table of a single batch, the smallest piece of work
+Unit = namedtuple('Unit', ['table', 'batch_id', 'batch_size'])
+
+
+class DagScheduler:
+    """
+    Keeps track of units and releases a unit as soon as the units of its
+    parent tables in the same batch are done. Parents are the tables with an
+    edge to the table in the graph, and the tables it chooses values from.
+    Cached dependency data produced by finished units is kept until its batch
+    is complete.
+    """
+
+    parents: Dict[str, List[str]]
+    table_deps: Mapping[str, AbstractSet[str]]
+
+    _pending: Dict[int, Set[str]]
+    _done: Dict[int, Set[str]]
+    _dep_data: Dict[int, Dict[str, np.ndarray]]
+
+    def __init__(self, graph: Mapping[str, Sequence[str]], sequence: Sequence[str],
+                 table_deps: Mapping[str, AbstractSet[str]]):
+        self.sequence = list(sequence)
+        self.table_deps = table_deps
+
+        # Tables choosing from the columns of another table depend on it as
+        # well, even if the graph has no edge between them
+        self.parents = {
+            table: [parent for parent in self.sequence
+                    if parent != table and (table in graph.get(parent, [])
+                                            or parent in self._dep_tables(table))]
+            for table in self.sequence
+        }
+        DagScheduler._check_acyclic(self.parents)
+
+        self._pending = {}
+        self._done = {}
+        self._dep_data = {}
+
+    def _dep_tables(self, table: str) -> Set[str]:
+        return {path.rpartition('.')[0] for path in self.table_deps.get(table, ())}
+
+    @classmethod
+    def _check_acyclic(cls, parents: Mapping[str, Sequence[str]]) -> None:
+        resolved = set()
+        remaining = dict(parents)
+        while remaining:
+            ready = [table for table, table_parents in remaining.items()
+                     if all(parent in resolved for parent in table_parents)]
+            if not ready:
+                raise ValueError(f'Cyclic dependencies between tables: { sorted(remaining) }')
+
+            for table in ready:
+                resolved.add(table)
+                del remaining[table]
+
+    @property
+    def num_open_batches(self) -> int:
+        """How many batches have units which are not done yet."""
+        return len(self._pending)
+
+    def _ready_units(self, batch_id: int, batch_size: int) -> List[Unit]:
+        done = self._done[batch_id]
+        ready = [table for table in self._pending[batch_id]
+                 if all(parent in done for parent in self.parents[table])]
+
+        for table in ready:
+            self._pending[batch_id].remove(table)
+
+        return [Unit(table, batch_id, batch_size)
+                for table in self.sequence if table in ready]
+
+    def add_batch(self, batch_id: int, batch_size: int) -> List[Unit]:
+        """Add all units of a batch, returns the units ready to run."""
+        self._pending[batch_id] = set(self.sequence)
+        self._done[batch_id] = set()
+        self._dep_data[batch_id] = {}
+        return self._ready_units(batch_id, batch_size)
+
+    def dependency_data(self, unit: Unit) -> Dict[str, np.ndarray]:
+        """Cached data of already finished units the unit's table depends on."""
+        batch_data = self._dep_data[unit.batch_id]
+        return {path: batch_data[path]
+                for path in self.table_deps.get(unit.table, ()) if path in batch_data}
+
+    def complete(self, unit: Unit, dep_data: Mapping[str, Any]) -> List[Unit]:
+        """Mark a unit as done, returns the units which became ready."""
+        self._done[unit.batch_id].add(unit.table)
+        self._dep_data[unit.batch_id].update(dep_data or {})
+
+        if len(self._done[unit.batch_id]) == len(self.sequence):
+            del self._pending[unit.batch_id]
+            del self._done[unit.batch_id]
+            del self._dep_data[unit.batch_id]
+            return []
+
+        return self._ready_units(unit.batch_id, unit.batch_size)
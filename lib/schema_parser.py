@@ -3,7 +3,8 @@ import json
 import re
 
 from collections import OrderedDict, namedtuple
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import List, Optional
 
 from pglast.parser import parse_sql_json
 
@@ -11,12 +12,39 @@ from pglast.parser import parse_sql_json
 COMMENT_RE = re.compile(r"--\s*(.+)")
 
 
+SUPPORTED_TYPES = (
+    'varchar', 'text', 'int2', 'int4', 'int8',
+    'timestamp', 'timestamptz', 'date', 'numeric', 'bpchar',
+    'uuid', 'serial', 'bigserial', 'json', 'jsonb', 'xml')
+
+
 @dataclass
 class Column:
     gen: str
     not_null: bool
     args: list
     none_prob: float
+    pg_type: str = None
+    pg_type_args: list = field(default_factory=list)
+
+
+@dataclass
+class Partition:
+    name: str
+    is_default: bool = False
+    # Values of a list partition, None is NULL
+    values: list = field(default_factory=list)
+    # Bounds of a range partition, one per key column, None is MINVALUE/MAXVALUE
+    lower: list = field(default_factory=list)
+    upper: list = field(default_factory=list)
+
+
+@dataclass
+class Partitioning:
+    strategy: str
+    # Key columns, None for expressions
+    columns: list
+    partitions: List[Partition] = field(default_factory=list)
 
 
 class Schema:
@@ -26,10 +54,33 @@ class Schema:
             self.schema = json.loads(parse_sql_json(self.raw_schema))
         assert self.schema
 
+    @classmethod
+    def _get_column_type(cls, column):
+        column_type = None
+        for type_name in column['typeName']['names']:
+            assert not column_type, 'column_type already set'
+
+            column_type = type_name['String']['str']
+            if column_type == 'pg_catalog':
+                column_type = None
+
+        return column_type
+
+    @classmethod
+    def _parse_gen_arg(cls, arg):
+        for arg_type in (int, float):
+            try:
+                return arg_type(arg)
+            except ValueError:
+                pass
+
+        return arg
+
     def _get_column_gen(self, column):
         column_location_start = column['location']
         column_location_end = self.raw_schema.find('\n', column_location_start)
         column_gen = None
+        column_gen_args = None
         column_none_prob = None
 
         raw = self.raw_schema[column_location_start:column_location_end]
@@ -39,34 +90,29 @@ class Schema:
             if comment.find('gen:') >= 0:
                 column_gen = comment.split('gen:')[1].strip()
 
+                # Further words are arguments of the generator, except for
+                # the paths of choose_from_list and ref
+                gen_name, *gen_args = column_gen.split()
+                if gen_args and gen_name not in ('choose_from_list', 'ref'):
+                    column_gen = gen_name
+                    column_gen_args = [Schema._parse_gen_arg(arg) for arg in gen_args]
+
             if comment.find('none_prob:') >= 0:
                 column_none_prob = float(comment.split('none_prob:')[1].strip())
 
         # The column generator might have been set from a comment
         # directly, thus do not overwrite
         if not column_gen:
-            column_type_def = column['typeName']
-            column_gen = None
-            for column_type in column_type_def['names']:
-                assert not column_gen, 'column_gen already set'
-
-                column_gen = column_type['String']['str']
-
-                if column_gen == 'pg_catalog':
-                    column_gen = None
-                    continue
+            column_gen = Schema._get_column_type(column)
 
-                if column_gen not in (
-                    'varchar', 'text', 'int2', 'int4', 'int8',
-                    'timestamp', 'timestamptz', 'date', 'numeric', 'bpchar',
-                    'serial', 'bigserial'):
-                    raise ValueError(f'Unsupported column generator: {column_gen}')
+            if column_gen not in SUPPORTED_TYPES:
+                raise ValueError(f'Unsupported column generator: {column_gen}')
 
-                if column_gen in ('serial', 'bigserial'):
-                    # Skip this column, will be generated automatically
-                    column_gen = 'skip'
+            if column_gen in ('serial', 'bigserial'):
+                # Skip this column, will be generated automatically
+                column_gen = 'skip'
 
-        return column_gen, column_none_prob
+        return column_gen, column_gen_args, column_none_prob
 
     @classmethod
     def _get_column_gen_args(cls, column_gen, column):
@@ -85,21 +131,98 @@ class Schema:
 
         return []
 
+    @classmethod
+    def _get_relation_name(cls, relation):
+        return f"{ relation.get('schemaname', 'public') }.{ relation['relname'] }"
+
+    @classmethod
+    def _get_bound_value(cls, node):
+        if 'TypeCast' in node:
+            node = node['TypeCast']['arg']
+
+        # MINVALUE and MAXVALUE
+        if 'ColumnRef' in node:
+            return None
+
+        value = node['A_Const']['val']
+        if 'Integer' in value:
+            return value['Integer'].get('ival', 0)
+
+        if 'Float' in value:
+            return float(value['Float']['str'])
+
+        if 'String' in value:
+            return value['String']['str']
+
+        return None
+
+    @classmethod
+    def _get_partition(cls, create_stmt):
+        bound = create_stmt['partbound']
+        return Partition(
+            Schema._get_relation_name(create_stmt['relation']),
+            bound.get('is_default', False),
+            [Schema._get_bound_value(node) for node in bound.get('listdatums', [])],
+            [Schema._get_bound_value(node) for node in bound.get('lowerdatums', [])],
+            [Schema._get_bound_value(node) for node in bound.get('upperdatums', [])])
+
+    def parse_partitioning(self) -> Optional[Partitioning]:
+        """
+        Partition key and partitions of a partitioned table, the partitions
+        being created in the same file using PARTITION OF. None if the table
+        is not partitioned.
+        """
+        partitioning = None
+        table_name = None
+        partitions = []
+
+        for stmt in self.schema['stmts']:
+            create_stmt = stmt.get('stmt', {}).get('CreateStmt', {})
+            if not create_stmt:
+                continue
+
+            if 'partbound' in create_stmt:
+                parent = create_stmt['inhRelations'][0]['RangeVar']
+                partitions.append((Schema._get_relation_name(parent),
+                                   Schema._get_partition(create_stmt)))
+
+            elif 'partspec' in create_stmt:
+                partspec = create_stmt['partspec']
+                table_name = Schema._get_relation_name(create_stmt['relation'])
+                partitioning = Partitioning(
+                    partspec['strategy'],
+                    [elem['PartitionElem'].get('name') for elem in partspec['partParams']])
+
+        if partitioning:
+            # Sub-partitions are routed by the server
+            partitioning.partitions = [
+                partition for parent, partition in partitions if parent == table_name]
+
+        return partitioning
 
     def parse_create_table(self):
         columns = OrderedDict()
 
         for stmt in self.schema['stmts']:
             create_stmt = stmt.get('stmt', {}).get('CreateStmt', {})
-            if create_stmt:
+            # Partitions share the columns of their parent
+            if create_stmt and 'partbound' not in create_stmt:
                 schema_name = create_stmt['relation'].get('schemaname', 'public')
                 table_name = create_stmt['relation']['relname']
 
                 for column in create_stmt['tableElts']:
                     column = column['ColumnDef']
                     column_name = column['colname']
-                    column_gen, column_none_prob = self._get_column_gen(column)
-                    column_gen_args = Schema._get_column_gen_args(column_gen, column)
+                    column_gen, column_gen_args, column_none_prob = self._get_column_gen(column)
+                    if column_gen_args is None:
+                        column_gen_args = Schema._get_column_gen_args(column_gen, column)
+                    column_type = Schema._get_column_type(column)
+
+                    # Only the widths of strings are needed, other typmods
+                    # may be missing, e.g., for an annotated NUMERIC
+                    column_type_args = []
+                    if column_type in ('bpchar', 'varchar'):
+                        column_type_args = Schema._get_column_gen_args(column_type, column)
 
                     constraints = column.get('constraints', [])
                     not_null = False
@@ -109,7 +232,7 @@ class Schema:
 
                     assert column_gen, f'Column generator empty, column: {column}'
                     column = Column(column_gen, not_null, column_gen_args,
-                                    column_none_prob)
+                                    column_none_prob, column_type, column_type_args)
                     columns[column_name] = column
 
             alter_table_stmt = stmt.get('stmt', {}).get('AlterTableStmt', {})
@@ -0,0 +1,168 @@
+"""
+This module shares cached dependency data between all worker processes.
+"""
+
+from multiprocessing.shared_memory import SharedMemory
+from typing import AbstractSet, Any, Dict, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from loguru import logger
+
+from lib.cache import Cache
+
+
+# Element type of a shared column per PostgreSQL type, strings need a length
+SHARED_DTYPES = {
+    'int2': np.int64,
+    'int4': np.int64,
+    'int8': np.int64,
+    'serial': np.int64,
+    'bigserial': np.int64,
+    'numeric': np.float64,
+    'date': 'datetime64[D]',
+    'timestamp': 'datetime64[us]',
+    'timestamptz': 'datetime64[us]',
+    'uuid': 'U36',
+}
+
+HEADER_SIZE = 8
+
+
+class SharedColumn:
+    """
+    Fixed-capacity column in shared memory, all workers append to it. The
+    first eight bytes hold the number of values stored so far.
+    """
+
+    def __init__(self, name: Optional[str], dtype: str, capacity: int, create: bool = False):
+        self.dtype = np.dtype(dtype)
+        self.capacity = capacity
+        size = HEADER_SIZE + max(1, capacity) * self.dtype.itemsize
+        self.shm = SharedMemory(name=name, create=create, size=size if create else 0)
+
+        self._count = np.ndarray((1,), dtype=np.int64, buffer=self.shm.buf)
+        self._data = np.ndarray((capacity,), dtype=self.dtype, buffer=self.shm.buf,
+                                offset=HEADER_SIZE)
+        if create:
+            self._count[0] = 0
+
+    def __len__(self) -> int:
+        return int(self._count[0])
+
+    def append(self, values: Sequence[Any], lock: Any) -> int:
+        """Append as many values as fit, returns how many were appended."""
+        values = np.asarray(values).astype(self.dtype)
+        with lock:
+            count = int(self._count[0])
+            num_values = min(len(values), self.capacity - count)
+            self._data[count:count + num_values] = values[:num_values]
+            # Publish the values only after they have been written
+            self._count[0] = count + num_values
+
+        return num_values
+
+    def values(self) -> np.ndarray:
+        """Get a view on all values appended so far."""
+        return self._data[:len(self)]
+
+    def close(self) -> None:
+        """Detach from the shared memory."""
+        self._count = None
+        self._data = None
+        self.shm.close()
+
+    def unlink(self) -> None:
+        """Free the shared memory, to be called once by its creator."""
+        self.shm.unlink()
+
+
+class SharedStore:
+    """All shared columns of a run, by cache path."""
+
+    # path -> (shared memory name, dtype, capacity)
+    specs: Dict[str, Tuple[str, str, int]]
+    columns: Dict[str, SharedColumn]
+
+    def __init__(self, specs: Mapping[str, Tuple[str, str, int]]):
+        """Attach to the shared columns described by specs."""
+        self.specs = dict(specs)
+        self.columns = {
+            path: SharedColumn(name, dtype, capacity)
+            for path, (name, dtype, capacity) in self.specs.items()
+        }
+
+    @classmethod
+    def create(cls, layout: Mapping[str, Tuple[str, int]]) -> 'SharedStore':
+        """Create shared columns for all paths of layout: path -> (dtype, capacity)."""
+        store = cls({})
+        for path, (dtype, capacity) in layout.items():
+            column = SharedColumn(None, dtype, capacity, create=True)
+            store.columns[path] = column
+            store.specs[path] = (column.shm.name, dtype, capacity)
+
+        return store
+
+    @classmethod
+    def get_dtype(cls, column) -> str:
+        """Element type for a cached column, based on its parsed schema column."""
+        if column.pg_type in ('bpchar', 'varchar') and column.pg_type_args:
+            return np.dtype(f'U{ column.pg_type_args[0] }').str
+
+        dtype = SHARED_DTYPES.get(column.pg_type)
+        if dtype is None:
+            raise ValueError(
+                f'Cannot share dependency columns of type { column.pg_type }, '
+                'a fixed-width type is required')
+
+        return np.dtype(dtype).str
+
+    def close(self) -> None:
+        """Detach from all shared columns."""
+        for column in self.columns.values():
+            column.close()
+
+    def unlink(self) -> None:
+        """Free all shared columns."""
+        for column in self.columns.values():
+            column.unlink()
+
+
+class SharedCache(Cache):
+    """
+    Cache backed by a SharedStore. Data added by any worker is visible to all
+    workers without copying, so children sample from the parent keys of all
+    batches generated so far instead of only those of their own batch.
+    """
+
+    def __init__(self, cache_map_source: AbstractSet[Tuple[str, str]],
+                 store: SharedStore, lock: Any):
+        self._shared = store
+        self._lock = lock
+        super().__init__(cache_map_source)
+
+    def _prepare_cache_store(self) -> None:
+        self._store = {}
+
+    def add(self, table_name: str, data) -> None:
+        """Append the cached columns of the table to the shared store."""
+        for column in self._cache_map.get(table_name, []):
+            path = Cache.build_path(table_name, column)
+            values = data.non_null(column)
+            if self._shared.columns[path].append(values, self._lock) < len(values):
+                logger.warning(f'Shared cache for { path } is full, dropping values')
+
+    def load(self, path: str, values: Sequence[Any]) -> None:
+        """Nothing to load, the data is shared already."""
+
+    def retrieve_table(self, table_name: str) -> Dict[str, np.ndarray]:
+        """Nothing to hand over between processes, the data is shared already."""
+        return {}
+
+    def retrieve(self, path: str) -> np.ndarray:
+        """Retrieve all values of a shared column."""
+        column = self._shared.columns.get(path)
+        if column is None:
+            return np.empty(0)
+
+        return column.values()
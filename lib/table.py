@@ -2,15 +2,24 @@
 This module contains schema-related type definitions.
 """
 
+import inspect
+
 from collections import namedtuple, OrderedDict
 from dataclasses import dataclass, field
-from typing import Set, Tuple
+from typing import List, Set, Tuple
 
 import lib.schema_parser as schema_parser
 
+from lib.random import Random
+
 
 Column = namedtuple('Column', ['name', 'rng', 'type'])
 
+# A column compiled for execution: `gen` is the unbound Random method to call,
+# `dependency` the path of the column referenced by 'choose_from_list' or 'ref'.
+ColumnPlan = namedtuple('ColumnPlan', [
+    'name', 'gen', 'args', 'none_prob', 'vectorized', 'dependency'])
+
 
 @dataclass
 class Table:
@@ -18,9 +27,55 @@ class Table:
     schema_path: str
     scaler: float
     schema: OrderedDict = field(init=False)
+    plan: List[ColumnPlan] = field(init=False, default=None, repr=False)
+    partitioning: schema_parser.Partitioning = field(init=False, default=None)
 
     def __post_init__(self):
-        self.schema = schema_parser.Schema(self.schema_path).parse_create_table()
+        schema = schema_parser.Schema(self.schema_path)
+        self.schema = schema.parse_create_table()
+        self.partitioning = schema.parse_partitioning()
+
+    @classmethod
+    def _compile_column(cls, column_name: str, column_gen) -> ColumnPlan:
+        """Resolve generator, arguments and dependency of a single column."""
+        dependency = None
+        if column_gen.gen.startswith(('choose_from_list', 'ref ')):
+            gen_name, dependency = column_gen.gen.split(' ')[:2]
+        else:
+            gen_name = column_gen.gen
+
+        gen = getattr(Random, gen_name, None)
+        if not callable(gen):
+            raise ValueError(f'Unknown column generator: { gen_name }')
+
+        vectorized = 'size' in inspect.signature(gen).parameters
+        return ColumnPlan(column_name, gen, tuple(column_gen.args), column_gen.none_prob,
+                          vectorized, dependency)
+
+    def get_plan(self) -> List[ColumnPlan]:
+        """Compile the schema into an execution plan, skipped columns are left out."""
+        if self.plan is None:
+            self.plan = [
+                Table._compile_column(column_name, column_gen)
+                for column_name, column_gen in self.schema.items()
+                if column_gen.gen != 'skip'
+            ]
+
+        return self.plan
+
+    def use_client_serials(self) -> List[str]:
+        """
+        Generate serial columns client-side using row_id instead of leaving
+        them to the server. Returns the names of the serial columns.
+        """
+        serials = []
+        for column_name, column_gen in self.schema.items():
+            if column_gen.gen == 'skip' and column_gen.pg_type in ('serial', 'bigserial'):
+                column_gen.gen = 'row_id'
+                serials.append(column_name)
+
+        self.plan = None
+        return serials
 
     def get_column_dependencies(self) -> Set[Tuple[str, str]]:
         """Return a set of (table, column) referenced by 'choose_from_list'"""
@@ -32,3 +87,14 @@ class Table:
                 deps.add((table, column))
 
         return deps
+
+    def get_column_references(self) -> Set[Tuple[str, str]]:
+        """Return a set of (table, column) referenced by 'ref'"""
+        refs = set()
+        for column_gen in self.schema.values():
+            if column_gen.gen.startswith('ref '):
+                path = column_gen.gen.split(' ')[1]
+                table, _, column = path.rpartition('.')
+                refs.add((table, column))
+
+        return refs
@@ -0,0 +1,67 @@
+"""
+This module assembles random texts from a vocabulary loaded once.
+"""
+
+from typing import Sequence
+
+import numpy as np
+
+from mimesis import Text
+
+
+# Words sampled from mimesis to collect its vocabulary, enough to draw each
+# of its few thousand words many times over
+VOCABULARY_SAMPLE = 100000
+
+
+class WordPool:
+    """
+    Vocabulary as an array of words. Texts of a whole column are drawn at
+    once: one call samples all word indices, one join creates a single string
+    of all words, which is then sliced into the texts of the single rows.
+    """
+
+    words: np.ndarray
+    lengths: np.ndarray
+
+    def __init__(self, words: Sequence[str]):
+        self.words = np.array(words, dtype=object)
+        self.lengths = np.array([len(word) for word in words], dtype=np.int64)
+
+    def __len__(self) -> int:
+        return len(self.words)
+
+    def texts(self, rng: np.random.Generator, num_words: Sequence[int],
+              separator: str = ' ') -> np.ndarray:
+        """Draw one text per entry of num_words, each with that many words."""
+        num_words = np.asarray(num_words, dtype=np.int64)
+        indices = rng.integers(0, len(self), size=int(num_words.sum()))
+        text = separator.join(self.words[indices].tolist())
+
+        # Offsets of the words' ends including the separator following them,
+        # and the offsets at which each row's words begin
+        ends = np.cumsum(self.lengths[indices] + len(separator))
+        bounds = np.concatenate(([0], ends))[np.concatenate(([0], np.cumsum(num_words)))]
+
+        cut = len(separator)
+        return np.array([text[start:max(start, stop - cut)]
+                         for start, stop in zip(bounds[:-1].tolist(), bounds[1:].tolist())],
+                        dtype=object)
+
+
+_word_pool: WordPool = None
+
+
+def get_word_pool() -> WordPool:
+    """
+    The vocabulary of mimesis' text provider, loaded once per process. It is
+    collected through the public API with a fixed seed, sorted to be the
+    same in every process.
+    """
+    global _word_pool
+
+    if _word_pool is None:
+        words = Text('en', seed=0).words(quantity=VOCABULARY_SAMPLE)
+        _word_pool = WordPool(sorted(set(words)))
+
+    return _word_pool
@@ -0,0 +1,205 @@
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from lib.batch import Batch
+from lib.keyspace import UnitKeys, mix_int8
+from lib.random import Random
+from lib.schema_parser import Column
+from lib.table import ColumnPlan, Table
+
+
+def arange(rand_gen, size=None):
+    return np.arange(size)
+
+
+def test_generate_column_vectorized(mocker):
+    rand_gen_mock = mocker.MagicMock()
+    cache_mock = mocker.MagicMock()
+
+    column_plan = ColumnPlan('a', arange, (), None, True, None)
+    values, nulls = Batch._generate_column(rand_gen_mock, column_plan, cache_mock, 3)
+
+    assert list(values) == [0, 1, 2]
+    assert nulls is None
+    rand_gen_mock.bool_sample.assert_not_called()
+    cache_mock.retrieve.assert_not_called()
+
+
+def test_generate_column_scalar_fallback(mocker):
+    rand_gen_mock = mocker.MagicMock()
+    gen_mock = mocker.MagicMock(return_value=42)
+    cache_mock = mocker.MagicMock()
+
+    column_plan = ColumnPlan('a', gen_mock, (1, 2), None, False, None)
+    values, _ = Batch._generate_column(rand_gen_mock, column_plan, cache_mock, 3)
+
+    assert values == [42, 42, 42]
+    assert gen_mock.call_count == 3
+    gen_mock.assert_called_with(rand_gen_mock, 1, 2)
+
+
+def test_generate_column_none_prob(mocker):
+    rand_gen_mock = mocker.MagicMock()
+    rand_gen_mock.bool_sample.return_value = np.array([True, False, True])
+    cache_mock = mocker.MagicMock()
+
+    column_plan = ColumnPlan('a', arange, (), 0.5, True, None)
+    values, nulls = Batch._generate_column(rand_gen_mock, column_plan, cache_mock, 3)
+
+    # Only the single non-NULL value is generated
+    assert list(values) == [0, 0, 0]
+    assert list(nulls) == [True, False, True]
+    rand_gen_mock.bool_sample.assert_called_once_with(0.5, size=3)
+
+
+def test_generate_column_none_prob_scalar(mocker):
+    rand_gen_mock = mocker.MagicMock()
+    rand_gen_mock.bool_sample.return_value = np.array([False, True, False])
+    gen_mock = mocker.MagicMock(return_value='x')
+    cache_mock = mocker.MagicMock()
+
+    column_plan = ColumnPlan('a', gen_mock, (), 0.5, False, None)
+    values, _ = Batch._generate_column(rand_gen_mock, column_plan, cache_mock, 3)
+
+    assert list(values) == ['x', None, 'x']
+    assert gen_mock.call_count == 2
+
+
+def test_generate_column_from_list(mocker):
+    rand_gen_mock = mocker.MagicMock()
+    gen_mock = mocker.MagicMock()
+    cache_mock = mocker.MagicMock()
+    cache_mock.retrieve.return_value = [1, 2, 3]
+
+    column_plan = ColumnPlan('a', gen_mock, (), None, False, 'a.b.c')
+    Batch._generate_column(rand_gen_mock, column_plan, cache_mock, 5)
+
+    cache_mock.retrieve.assert_called_once_with('a.b.c')
+    gen_mock.assert_called_once_with(rand_gen_mock, [1, 2, 3], picks=5)
+
+
+def test_sample_from_source(mocker):
+    schema_mock = mocker.patch('lib.schema_parser.Schema')
+    schema_mock.return_value.parse_create_table.return_value = OrderedDict([
+        ('a', Column('int4', True, [], None)),
+        ('b', Column('skip', False, [], None)),
+        ('c', Column('numeric', True, [10, 2], 0.5)),
+    ])
+    plan = Table(schema_path='foobar.sql', scaler=1).get_plan()
+
+    batch = Batch.sample_from_source(Random(seed=1), 10, plan, None)
+    assert len(batch) == 10
+    assert list(batch.columns.keys()) == ['a', 'c']
+    assert len(batch.column('a')) == 10
+    assert len(batch.column('c')) == 10
+    assert list(batch.nulls.keys()) == ['c']
+
+
+def test_column_and_to_csv():
+    batch = Batch(OrderedDict([
+        ('a', np.array([1, 2])),
+        ('b', ['x', None]),
+    ]), 2)
+
+    assert list(batch.column('a')) == [1, 2]
+    assert list(batch.column('b')) == ['x', None]
+    assert batch.to_csv() == '1|x\n2|\n'
+
+
+def test_nulls():
+    batch = Batch(OrderedDict([
+        ('a', np.array([1, 0, 3])),
+        ('b', ['x', 'y', 'z']),
+    ]), 3, {'a': np.array([False, True, False])})
+
+    assert list(batch.column('a')) == [1, None, 3]
+    assert list(batch.non_null('a')) == [1, 3]
+    assert list(batch.non_null('b')) == ['x', 'y', 'z']
+    assert batch.to_csv() == '1|x\n|y\n3|z\n'
+
+
+def test_to_csv_no_columns():
+    batch = Batch(OrderedDict(), 2)
+    assert batch.to_csv() == '\n\n'
+
+
+def test_slice():
+    batch = Batch(OrderedDict([
+        ('a', np.array([1, 0, 3])),
+        ('b', ['x', 'y', 'z']),
+    ]), 3, {'a': np.array([False, True, False])})
+
+    sliced = batch.slice(1, 5)
+    assert len(sliced) == 2
+    assert list(sliced.column('a')) == [None, 3]
+    assert list(sliced.column('b')) == ['y', 'z']
+
+
+def test_take():
+    batch = Batch(OrderedDict([
+        ('a', np.array([1, 0, 3])),
+        ('b', ['x', 'y', 'z']),
+    ]), 3, {'a': np.array([False, True, False])})
+
+    taken = batch.take(np.array([2, 1]))
+    assert len(taken) == 2
+    assert list(taken.column('a')) == [3, None]
+    assert list(taken.column('b')) == ['z', 'y']
+
+
+def test_generate_column_row_id(mocker):
+    rand_gen_mock = mocker.MagicMock()
+    rand_gen_mock.bool_sample.return_value = np.array([False, True, False])
+
+    column_plan = ColumnPlan('a', Random.row_id, (), 0.5, True, None)
+    values, nulls = Batch._generate_column(
+        rand_gen_mock, column_plan, None, 3, UnitKeys(11, {}))
+
+    # NULLs leave gaps instead of shifting the keys behind them
+    assert list(values) == [11, 12, 13]
+    assert list(nulls) == [False, True, False]
+
+
+def test_generate_column_ref():
+    column_plan = ColumnPlan('a', Random.ref, (), None, True, 'x.y.id')
+    values, _ = Batch._generate_column(
+        Random(seed=1), column_plan, None, 100, UnitKeys(None, {'x.y.id': (11, 21)}))
+
+    assert len(values) == 100
+    assert values.min() >= 11
+    assert values.max() < 21
+
+    with pytest.raises(ValueError):
+        Batch._generate_column(Random(seed=1), column_plan, None, 100, UnitKeys(None, {}))
+
+
+def test_generate_column_ref_generators():
+    keys = UnitKeys(None, {'x.y.id': (11, 21, 'row_id'), 'x.y.k': (11, 21, 'unique_int8')})
+    ids, _ = Batch._generate_column(
+        Random(seed=1), ColumnPlan('a', Random.ref, (), None, True, 'x.y.id'), None, 100, keys)
+    ks, _ = Batch._generate_column(
+        Random(seed=1), ColumnPlan('b', Random.ref, (), None, True, 'x.y.k'), None, 100, keys)
+
+    assert set(ids) <= set(range(11, 21))
+    assert set(ks) <= set(mix_int8(np.arange(11, 21)))
+
+
+def test_to_csv_datetime():
+    columns = OrderedDict([
+        ('a', np.array(['2020-01-02T03:04:05.000006', '2020-01-01'], dtype='datetime64[us]')),
+        ('b', np.array(['2020-01-02', '2020-01-03'], dtype='datetime64[D]')),
+    ])
+    batch = Batch(columns, 2, {'b': np.array([False, True])})
+
+    assert batch.to_csv() == (
+        '2020-01-02T03:04:05.000006|2020-01-02\n2020-01-01T00:00:00.000000|\n')
+
+
+def test_generate_column_timeseries():
+    column_plan = ColumnPlan('a', Random.timeseries, ('2020-01-01', 60), None, True, None)
+    values, _ = Batch._generate_column(Random(seed=1), column_plan, None, 3, UnitKeys(11, {}))
+
+    assert values[0] == np.datetime64('2020-01-01T00:10')
+    assert values[2] == np.datetime64('2020-01-01T00:12')
@@ -0,0 +1,84 @@
+import struct
+
+from collections import OrderedDict
+from datetime import date, datetime
+from uuid import UUID
+
+import numpy as np
+import pytest
+
+import lib.binary_copy as binary_copy
+
+from lib.batch import Batch
+
+
+def test_encode_numeric():
+    def numeric(ndigits, weight, sign, dscale, *digits):
+        return struct.pack(f'!hhHh{ len(digits) }H', ndigits, weight, sign, dscale, *digits)
+
+    assert binary_copy.encode_numeric(12.5) == numeric(2, 0, 0, 1, 12, 5000)
+    assert binary_copy.encode_numeric(-0.0001) == numeric(1, -1, 0x4000, 4, 1)
+    assert binary_copy.encode_numeric(10000) == numeric(1, 1, 0, 0, 1)
+    assert binary_copy.encode_numeric(123456.78) == numeric(3, 1, 0, 2, 12, 3456, 7800)
+    assert binary_copy.encode_numeric(0.0) == numeric(0, 0, 0, 1)
+    assert binary_copy.encode_numeric(-0.0) == numeric(0, 0, 0, 1)
+    assert binary_copy.encode_numeric(float('nan')) == numeric(0, 0, 0xC000, 0)
+
+
+def test_encode_fixed_width_batch():
+    batch = Batch(OrderedDict([
+        ('a', np.array([1, -2])),
+        ('b', np.array([3, 4])),
+    ]), 2)
+
+    rows = binary_copy.encode_rows(batch, ['int2', 'int8'])
+    assert rows == (
+        struct.pack('!hihiq', 2, 2, 1, 8, 3) +
+        struct.pack('!hihiq', 2, 2, -2, 8, 4))
+
+
+def test_encode_rows_with_nulls():
+    batch = Batch(OrderedDict([
+        ('a', np.array([1, 0])),
+        ('b', ['foo', 'bär']),
+    ]), 2, {'a': np.array([False, True])})
+
+    rows = binary_copy.encode_rows(batch, ['int4', 'text'])
+    assert rows == (
+        struct.pack('!hii', 2, 4, 1) + struct.pack('!i', 3) + b'foo' +
+        struct.pack('!hi', 2, -1) + struct.pack('!i', 4) + 'bär'.encode('utf-8'))
+
+
+def test_encode_temporal_and_uuid():
+    uuid = UUID('12345678-1234-5678-1234-567812345678')
+    batch = Batch(OrderedDict([
+        ('a', [date(2000, 1, 2)]),
+        ('b', [datetime(2000, 1, 1, 0, 0, 1)]),
+        ('c', [uuid]),
+    ]), 1)
+
+    rows = binary_copy.encode_rows(batch, ['date', 'timestamp', 'uuid'])
+    assert rows == (
+        struct.pack('!hiiiq', 3, 4, 1, 8, 1000000) + struct.pack('!i', 16) + uuid.bytes)
+
+
+def test_encode_unsupported_type():
+    batch = Batch(OrderedDict([('a', [1.0])]), 1, {'a': np.array([False])})
+    with pytest.raises(ValueError):
+        binary_copy.encode_rows(batch, ['float8'])
+
+
+def test_encode_uuid_strings():
+    uuid = UUID('12345678-1234-5678-1234-567812345678')
+    batch = Batch(OrderedDict([('a', np.array([str(uuid), ''], dtype='U36'))]), 2,
+                  {'a': np.array([False, True])})
+
+    rows = binary_copy.encode_rows(batch, ['uuid'])
+    assert rows == (struct.pack('!hi', 1, 16) + uuid.bytes + struct.pack('!hi', 1, -1))
+
+
+def test_encode_documents():
+    batch = Batch(OrderedDict([('a', ['{}']), ('b', ['{}']), ('c', ['<a/>'])]), 1)
+    rows = binary_copy.encode_rows(batch, ['json', 'jsonb', 'xml'])
+    assert rows == (struct.pack('!hi', 3, 2) + b'{}' + struct.pack('!i', 3) + b'\x01{}'
+                    + struct.pack('!i', 4) + b'<a/>')
@@ -1,5 +1,9 @@
+from collections import OrderedDict
 
-from lib.cache import Cache
+import numpy as np
+
+from lib.batch import Batch
+from lib.cache import Cache, CacheColumn
 
 
 def test_cache():
@@ -22,10 +26,10 @@ def test_cache():
     cache.add('b', data)
 
     a_bla = cache.retrieve('a.bla')
-    assert a_bla == [1, 3]
+    assert list(a_bla) == [1, 3]
 
     b_bla = cache.retrieve('b.bla')
-    assert b_bla == []
+    assert len(b_bla) == 0
 
 
 def test_cache_no_columns():
@@ -41,4 +45,53 @@ def test_cache_no_columns():
     cache.add('a', data)
 
     a_bla = cache.retrieve('a.bla')
-    assert a_bla == []
+    assert len(a_bla) == 0
+
+
+def test_cache_batch():
+    cache = Cache(set((('a', 'bla'),)))
+    cache.add('a', Batch(OrderedDict([('bla', [1, 3]), ('xyz', [2, 4])]), 2))
+
+    assert list(cache.retrieve('a.bla')) == [1, 3]
+
+
+def test_cache_batch_nulls():
+    cache = Cache(set((('a', 'bla'),)))
+    cache.add('a', Batch(OrderedDict([('bla', np.array([1, 0, 3]))]), 3,
+                         {'bla': np.array([False, True, False])}))
+
+    assert list(cache.retrieve('a.bla')) == [1, 3]
+
+
+def test_cache_column_growth(mocker):
+    mocker.patch.object(CacheColumn, 'CHUNK_SIZE', 4)
+    column = CacheColumn()
+    assert len(column.values()) == 0
+
+    column.extend(np.arange(3))
+    column.extend(np.arange(3, 10))
+    column.extend([])
+
+    assert len(column) == 10
+    assert column.values().dtype == np.int64
+    assert list(column.values()) == list(range(10))
+
+
+def test_cache_column_dtype_promotion():
+    column = CacheColumn()
+    column.extend(np.array(['ab', 'cd']))
+    column.extend(np.array(['efgh']))
+
+    assert list(column.values()) == ['ab', 'cd', 'efgh']
+
+
+def test_cache_load_retrieve_table():
+    cache = Cache(set((('a', 'bla'), ('a', 'foo'))))
+    cache.load('a.bla', np.array([1, 2]))
+    cache.load('b.bla', np.array([1, 2]))
+
+    table_data = cache.retrieve_table('a')
+    assert list(table_data['a.bla']) == [1, 2]
+    assert len(table_data['a.foo']) == 0
+    assert len(cache.retrieve('b.bla')) == 0
+    assert cache.retrieve_table('b') == {}
@@ -0,0 +1,60 @@
+import csv
+import io
+
+from collections import OrderedDict
+
+import numpy as np
+
+import lib.csv_format as csv_format
+
+from lib.batch import Batch
+from lib.base_object import BaseObject
+
+
+def test_quote():
+    assert csv_format.quote('abc') == 'abc'
+    assert csv_format.quote('') == '""'
+    assert csv_format.quote('a|b') == '"a|b"'
+    assert csv_format.quote('a"b') == '"a""b"'
+    assert csv_format.quote('a\nb') == '"a\nb"'
+    assert csv_format.quote('\\.') == '"\\."'
+
+
+def test_format_column():
+    nulls = np.array([False, True, False])
+
+    assert csv_format.format_column(np.array([1, 2, 3]), nulls) == ['1', '', '3']
+    assert csv_format.format_column(np.array([0.5, 1.0, 2.25])) == ['0.5', '1.0', '2.25']
+    assert csv_format.format_column(
+        np.array(['2020-01-01', '2020-01-02', '2020-01-03'], dtype='datetime64[D]'),
+        nulls) == ['2020-01-01', '', '2020-01-03']
+
+    assert csv_format.format_column(np.array(['a', '', 'c']), nulls) == ['a', '', 'c']
+    assert csv_format.format_column(np.array(['a', '', 'c|d'])) == ['a', '""', '"c|d"']
+    assert csv_format.format_column(['a', None, 'c"d', 42]) == ['a', '', '"c""d"', '42']
+
+
+def test_format_rows():
+    assert csv_format.format_rows([['1', '2'], ['a', '']], 2) == '1|a\n2|\n'
+    assert csv_format.format_rows([], 2) == '\n\n'
+    assert csv_format.format_rows([[]], 0) == ''
+
+
+def test_round_trip():
+    values = ['plain', 'pipe|pipe', 'quote"quote', 'line\nbreak', '', None]
+    batch = Batch(OrderedDict([
+        ('a', np.arange(len(values))),
+        ('b', values),
+        ('c', np.array([value or '' for value in values])),
+    ]), len(values), {'c': np.array([value is None for value in values])})
+
+    reader = csv.reader(io.StringIO(batch.to_csv()), delimiter='|', quotechar='"')
+    rows = list(reader)
+    assert [row[1] for row in rows] == [value or '' for value in values]
+    assert [row[2] for row in rows] == [value or '' for value in values]
+    assert batch.to_csv().split('\n')[1] == '1|"pipe|pipe"|"pipe|pipe"'
+
+
+def test_base_object_quoting():
+    raw = OrderedDict([('a', 'x|y'), ('b', None), ('c', '')])
+    assert BaseObject(raw).to_sql() == '"x|y"||""'
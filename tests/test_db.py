@@ -1,7 +1,11 @@
 
+from collections import OrderedDict
+
+import psycopg2
 import pytest
 
-from lib.db import DB
+from lib.batch import Batch
+from lib.db import CopyStream, DB
 
 
 DSN = 'postgresql://postgres@nohost/nodb'
@@ -12,13 +16,6 @@ def mock_connect(mocker):
     return mocker.patch('psycopg2.connect')
 
 
-@pytest.fixture
-def mock_data_obj(mocker):
-    obj_mock = mocker.MagicMock()
-    obj_mock.to_sql.return_value = '1,2,3'
-    return obj_mock
-
-
 def test_ctx_manager(mock_connect):
     db = None
     with DB(DSN) as db:
@@ -39,12 +36,7 @@ def test_ctx_manager_exit_no_obj(mock_connect):
     assert db
 
 
-def test_objs_to_csv(mock_data_obj):
-    retval = DB._objs_to_csv([mock_data_obj, mock_data_obj])
-    assert retval.read() == '1,2,3\n1,2,3\n'
-
-
-def test_ingest_table(mock_data_obj, mocker):
+def test_ingest_table(mocker):
     column = mocker.MagicMock()
     skip_column = mocker.MagicMock()
     skip_column.gen = 'skip'
@@ -58,7 +50,8 @@ def test_ingest_table(mock_data_obj, mocker):
     }
 
     with DB(DSN) as db:
-        db.ingest_table(table, schema, [mock_data_obj, mock_data_obj])
+        batch = Batch(OrderedDict([('a', [1]), ('b', [2]), ('c', [3])]), 1)
+        db.ingest_table(table, schema, batch)
 
     db.cur.copy_expert.assert_called_once()
     first_call = db.cur.copy_expert.mock_calls[0]
@@ -68,6 +61,7 @@ def test_ingest_table(mock_data_obj, mocker):
 
     ref = "COPY bla(\"a\",\"b\",\"c\") FROM STDIN WITH(FORMAT CSV, DELIMITER '|')"
     assert cleanup(first_call.args[0]) == cleanup(ref)
+    assert first_call.args[1].read() == '1|2|3\n'
 
 
 def test_truncate_table():
@@ -78,9 +72,173 @@ def test_truncate_table():
     db.cur.execute.assert_called_once_with('TRUNCATE foobar CASCADE')
 
 
-def test_vacuum_analyze_table():
-    db = None
+def test_set_settings():
+    with DB(DSN) as db:
+        db.set_settings({'max_parallel_maintenance_workers': 4})
+
+    db.cur.execute.assert_called_once_with(
+        'SELECT set_config(%s, %s, false)', ('max_parallel_maintenance_workers', '4'))
+
+
+def test_connect_settings(mock_connect):
+    db = DB(DSN, {'TimeZone': 'UTC'})
+    db.connect()
+    db.reconnect()
+
+    assert db.cur.execute.call_count == 2
+    db.cur.execute.assert_called_with('SELECT set_config(%s, %s, false)', ('TimeZone', 'UTC'))
+
+
+def test_batch_to_csv():
+    batch = Batch(OrderedDict([('a', [1, 2, 3]), ('b', [None, 'x', 'y'])]), 3)
+    retval = DB._batches_to_csv([batch, batch.slice(0, 1)], 2)
+    assert retval.read() == '1|\n2|x\n3|y\n1|\n'
+
+
+def test_copy_stream():
+    chunks_read = []
+
+    def chunks():
+        for chunk in ('abc', 'de', 'fghij'):
+            chunks_read.append(chunk)
+            yield chunk
+
+    stream = CopyStream(chunks())
+    assert chunks_read == []
+
+    assert stream.read(2) == 'ab'
+    assert chunks_read == ['abc']
+
+    assert stream.read(4) == 'cdef'
+    assert stream.read() == 'ghij'
+    assert stream.read(10) == ''
+
+
+def test_copy_stream_bytes():
+    stream = CopyStream(iter([b'ab', b'cd']))
+    assert stream.read(3) == b'abc'
+    assert stream.read(3) == b'd'
+    assert stream.read(3) == b''
+
+
+def test_ingest_table_binary(mocker):
+    column = mocker.MagicMock()
+    column.pg_type = 'int4'
+    batch = Batch(OrderedDict([('a', [1, 2])]), 2)
+
+    with DB(DSN) as db:
+        db.ingest_table('bla', {'a': column}, batch, 'binary')
+
+    first_call = db.cur.copy_expert.mock_calls[0]
+    assert 'FORMAT BINARY' in first_call.args[0]
+    assert first_call.args[1].read().startswith(b'PGCOPY\n\xff\r\n\x00')
+
+
+def test_ingest_table_truncate(mocker):
+    column = mocker.MagicMock()
+    batch = Batch(OrderedDict([('a', [1, 2])]), 2)
+
+    with DB(DSN) as db:
+        db.ingest_table('bla', {'a': column}, batch, truncate=True)
+
+    assert [call.args[0] for call in db.cur.execute.mock_calls] == [
+        'BEGIN', 'TRUNCATE bla', 'COMMIT']
+    assert 'FREEZE' in db.cur.copy_expert.mock_calls[0].args[0]
+
+
+def test_ingest_table_truncate_rollback(mocker):
+    column = mocker.MagicMock()
+    batch = Batch(OrderedDict([('a', [1, 2])]), 2)
+
     with DB(DSN) as db:
-        db.vacuum_analyze_table('foobar')
+        db.conn.closed = 0
+        db.cur.copy_expert.side_effect = psycopg2.DataError()
+        with pytest.raises(psycopg2.DataError):
+            db.ingest_table('bla', {'a': column}, batch, truncate=True)
+
+    db.cur.execute.assert_called_with('ROLLBACK')
+
+
+def test_ingest_table_checkpoint(mocker):
+    column = mocker.MagicMock()
+    batch = Batch(OrderedDict([('a', [1, 2])]), 2)
+
+    with DB(DSN) as db:
+        db.ingest_table('bla', {'a': column}, batch)
+        db.cur.execute.assert_not_called()
+
+        db.ingest_batches('bla', {'a': column}, [batch], checkpoint=('bla', 3, 42, 'abc'))
+
+    assert [call.args for call in db.cur.execute.mock_calls] == [
+        ('BEGIN',),
+        ('INSERT INTO datagen_checkpoints VALUES (%s, %s, %s, %s)', ('bla', 3, 42, 'abc')),
+        ('COMMIT',),
+    ]
+    assert 'FREEZE' not in db.cur.copy_expert.mock_calls[-1].args[0]
+
+
+def test_transaction_nested():
+    with DB(DSN) as db:
+        with db.transaction():
+            with db.transaction():
+                db.cur.execute('SELECT 1')
+
+    assert [call.args[0] for call in db.cur.execute.mock_calls] == [
+        'BEGIN', 'SELECT 1', 'COMMIT']
+
+
+def test_connect_close(mock_connect):
+    db = DB(DSN)
+    assert db.closed
+
+    db.connect()
+    mock_connect.return_value.closed = 0
+    assert not db.closed
+    assert db.connections == 1
+
+    db.reconnect()
+    assert db.connections == 2
+    db.conn.close.assert_called_once()
+
+
+def test_call_with_reconnect(mock_connect):
+    mock_connect.return_value.closed = 0
+    db = DB(DSN)
+    db.connect()
+
+    calls = []
+
+    def func(dbconn):
+        calls.append(dbconn)
+        if len(calls) == 1:
+            mock_connect.return_value.closed = 2
+            raise psycopg2.OperationalError('server closed the connection')
+
+        return 42
+
+    assert db.call_with_reconnect(func) == 42
+    assert calls == [db, db]
+    assert db.connections == 2
+
+
+def test_call_with_reconnect_not_broken(mock_connect):
+    mock_connect.return_value.closed = 0
+    db = DB(DSN)
+    db.connect()
+
+    def func(dbconn):
+        raise psycopg2.OperationalError('canceling statement')
+
+    with pytest.raises(psycopg2.OperationalError):
+        db.call_with_reconnect(func)
+
+    assert db.connections == 1
+
+
+def test_set_serial(mocker):
+    db = DB(DSN)
+    db.cur = mocker.MagicMock()
 
-    db.cur.execute.assert_called_once_with('VACUUM ANALYZE foobar')
+    db.set_serial('public.a', 'id', 42)
+    db.cur.execute.assert_called_once_with(
+        'SELECT setval(pg_get_serial_sequence(%s, %s), %s)', ('public.a', 'id', 42))
@@ -1,13 +1,23 @@
 
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
 import pytest
 
+import lib.executor as executor_module
+
+from lib.batch import Batch
 from lib.executor import Executor
+from lib.scheduler import DagScheduler, Unit
+from lib.schema_parser import Column, Partition, Partitioning
 from lib.table import Table
 
 
 @pytest.fixture
 def executor(mocker):
-    mocker.patch('lib.schema_parser.Schema')
+    schema_mock = mocker.patch('lib.schema_parser.Schema')
+    schema_mock.return_value.parse_partitioning.return_value = None
 
     class ExecutorFixture(Executor):
         def __init__(self):
@@ -38,3 +48,367 @@ def test_sequence_no_deps(executor):
 
     sequence = executor._generate_sequence()
     assert sequence == ['x', 'y', 'z']
+
+
+def test_report_connections(mocker):
+    logger_mock = mocker.patch('lib.executor.logger')
+    connections = {}
+    Executor._add_worker_stats(connections, [(1, 1), (2, 1)])
+    Executor._add_worker_stats(connections, [(1, 2), (2, 1)])
+    assert connections == {1: 2, 2: 1}
+
+    Executor._report_connections(connections)
+    logger_mock.info.assert_called_once_with(
+        'Opened 3 database connections across 2 workers')
+
+
+def test_worker_db(mocker):
+    connect_mock = mocker.patch('psycopg2.connect')
+    connect_mock.return_value.closed = 0
+    mocker.patch('lib.executor.Finalize')
+
+    executor_module._init_worker('postgresql://nohost')
+    db = executor_module._get_worker_db()
+    assert db.connections == 1
+    assert executor_module._get_worker_stats()[1] == 1
+
+    db.conn.closed = 2
+    executor_module._get_worker_db()
+    assert db.connections == 2
+    db.cur.execute.assert_called_with('SELECT set_config(%s, %s, false)', ('TimeZone', 'UTC'))
+
+
+def test_get_unit_seed():
+    seed = Executor._get_unit_seed('a', 1)
+    assert seed == Executor._get_unit_seed('a', 1)
+    assert seed != Executor._get_unit_seed('a', 2)
+    assert seed != Executor._get_unit_seed('b', 1)
+
+
+def test_run_unit(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.pipeline = False
+    mocker.patch('lib.executor._get_worker_stats', return_value=(1, 1))
+    ingest_mock = mocker.patch.object(executor, '_ingest')
+
+    def ingest(table_name, rand_gen, rows_to_gen, cache, keys, truncate, checkpoint):
+        assert list(cache.retrieve('a.x')) == [1, 2]
+        cache.load('c.y', [5, 6])
+
+    ingest_mock.side_effect = ingest
+
+    executor.deps = set((('a', 'x'), ('c', 'y')))
+    dep_data, stats = executor._run_unit(Unit('c', 1, 20), {'a.x': [1, 2]})
+
+    assert list(dep_data['c.y']) == [5, 6]
+    assert stats == (1, 1)
+    assert ingest_mock.call_args.args[0] == 'c'
+    assert ingest_mock.call_args.args[2] == 2
+    assert ingest_mock.call_args.args[5] is False
+    assert ingest_mock.call_args.args[6] is None
+
+
+def test_run_unit_checkpoint(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.pipeline = False
+    executor.checkpoint = True
+    executor.fingerprints = {'c': 'abc'}
+    mocker.patch('lib.executor._get_worker_stats', return_value=(1, 1))
+    ingest_mock = mocker.patch.object(executor, '_ingest')
+
+    executor._run_unit(Unit('c', 2, 20), {})
+    assert ingest_mock.call_args.args[6] == ('c', 2, Executor._get_unit_seed('c', 2), 'abc')
+
+
+def test_run_unit_resume(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.pipeline = False
+    executor.deps = frozenset((('c', 'y'),))
+    executor.done = frozenset((('c', 1), ('b', 1)))
+    mocker.patch('lib.executor._get_worker_stats', return_value=(1, 1))
+    ingest_mock = mocker.patch.object(executor, '_ingest')
+    sample_mock = mocker.patch('lib.executor.Batch.sample_from_source')
+    sample_mock.return_value = Batch(OrderedDict([('y', np.array([5, 6]))]), 2)
+
+    # Children depend on c, its data is generated but not ingested
+    dep_data, _ = executor._run_unit(Unit('c', 1, 20), {})
+    assert list(dep_data['c.y']) == [5, 6]
+    sample_mock.assert_called_once()
+
+    sample_mock.reset_mock()
+    executor._run_unit(Unit('b', 1, 20), {})
+    sample_mock.assert_not_called()
+    ingest_mock.assert_not_called()
+
+
+def checkpoint_args(mocker, **kwargs):
+    args = mocker.MagicMock()
+    args.rows = 100
+    args.batch_size = 10
+    args.pipeline = False
+    args.truncate = False
+    args.resume = True
+    args.shard_index = 0
+    args.shard_count = 1
+    for name, value in kwargs.items():
+        setattr(args, name, value)
+
+    return args
+
+
+def test_get_fingerprint(executor, mocker):
+    executor.args = checkpoint_args(mocker)
+    fingerprint = executor._get_fingerprint('a')
+    assert fingerprint == executor._get_fingerprint('a')
+    assert fingerprint != executor._get_fingerprint('b')
+
+    for name, value in (('rows', 200), ('batch_size', 20), ('pipeline', True)):
+        executor.args = checkpoint_args(mocker, **{name: value})
+        assert executor._get_fingerprint('a') != fingerprint
+
+    executor.args = checkpoint_args(mocker, pipeline=True, copy_chunk_rows=5)
+    pipelined = executor._get_fingerprint('a')
+    executor.args.copy_chunk_rows = 6
+    assert executor._get_fingerprint('a') != pipelined
+
+
+def test_prepare_checkpoints(executor, mocker):
+    executor.args = checkpoint_args(mocker, shard_count=2)
+    executor.fingerprints = {'a': 'abc'}
+    db_mock = mocker.patch('lib.executor.DB').return_value.__enter__.return_value
+
+    # Batch 2 belongs to the other shard
+    db_mock.get_checkpoints.return_value = [('a', 1, 1, 'abc'), ('a', 2, 2, 'xyz')]
+    assert executor._prepare_checkpoints() == {('a', 1)}
+    db_mock.create_checkpoint_table.assert_called_once()
+
+    db_mock.get_checkpoints.return_value = [('a', 3, 3, 'xyz')]
+    with pytest.raises(ValueError, match='different arguments'):
+        executor._prepare_checkpoints()
+
+    executor.args.truncate = True
+    with pytest.raises(ValueError):
+        executor._prepare_checkpoints()
+
+
+def test_prepare_checkpoints_existing(executor, mocker):
+    executor.args = checkpoint_args(mocker, resume=False)
+    db_mock = mocker.patch('lib.executor.DB').return_value.__enter__.return_value
+
+    db_mock.get_checkpoints.return_value = []
+    assert executor._prepare_checkpoints() == set()
+
+    db_mock.get_checkpoints.return_value = [('a', 1, 1, 'abc')]
+    with pytest.raises(ValueError, match='--resume'):
+        executor._prepare_checkpoints()
+
+
+def test_run_unit_freeze(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.pipeline = False
+    executor.freeze = True
+    mocker.patch('lib.executor._get_worker_stats', return_value=(1, 1))
+    ingest_mock = mocker.patch.object(executor, '_ingest')
+
+    # Only the first batch truncates
+    executor._run_unit(Unit('c', 1, 20), {})
+    assert ingest_mock.call_args.args[5] is True
+
+    executor._run_unit(Unit('c', 2, 20), {})
+    assert ingest_mock.call_args.args[5] is False
+
+
+def test_get_batches(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.rows = 25
+    executor.args.batch_size = 10
+    executor.args.shard_index = 0
+    executor.args.shard_count = 1
+
+    batches = executor._get_batches()
+    assert next(batches) == (1, 10)
+    assert list(batches) == [(2, 10), (3, 5)]
+
+
+def test_get_batches_sharded(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.rows = 25
+    executor.args.batch_size = 5
+    executor.args.shard_count = 2
+
+    executor.args.shard_index = 0
+    assert list(executor._get_batches()) == [(1, 5), (3, 5), (5, 5)]
+
+    executor.args.shard_index = 1
+    assert list(executor._get_batches()) == [(2, 5), (4, 5)]
+
+
+def test_check_sharding(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.shard_index = 2
+    executor.args.shard_count = 2
+
+    with pytest.raises(ValueError):
+        executor._check_sharding()
+
+    executor.args.shard_index = 1
+    executor.args.truncate = False
+    executor.args.fast_load = False
+    executor.args.unlogged = False
+    executor._check_sharding()
+
+    executor.args.truncate = True
+    with pytest.raises(ValueError, match='--truncate'):
+        executor._check_sharding()
+
+
+def test_run_dag_window(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.batches_per_worker = 2
+    executor.args.max_parallel_workers = 1
+
+    scheduler = DagScheduler(executor.graph, executor._generate_sequence(), {})
+    units = []
+    open_batches = []
+
+    def run_unit(unit, dep_data):
+        units.append(unit)
+        open_batches.append(scheduler.num_open_batches)
+        return {}, (len(units) % 2, len(units))
+
+    mocker.patch.object(executor, '_run_unit', side_effect=run_unit)
+    mocker.patch.object(executor_module, '_worker_executor', executor)
+
+    batches = iter([(idx, 10) for idx in range(1, 6)])
+    with ThreadPoolExecutor(1) as pool:
+        connections = {}
+        executor._run_dag(pool, scheduler, batches, connections)
+
+    assert connections == {0: 14, 1: 15}
+    assert sorted(units) == sorted(
+        Unit(table, batch_id, 10) for table in 'abc' for batch_id in range(1, 6))
+    assert max(open_batches) <= 2
+
+
+def test_get_total_rows(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.rows = 25
+    executor.args.batch_size = 10
+
+    assert executor._get_total_rows('a') == 25
+    assert executor._get_total_rows('b') == 250
+    assert executor._get_total_rows('c') == 3
+
+    executor.tables['a'].scaler = ('uniform', 1, 2)
+    assert executor._get_total_rows('a') is None
+
+
+def test_check_references(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.rows = 25
+    executor.args.batch_size = 10
+
+    executor.tables['a'].schema = OrderedDict([('id', Column('row_id', True, [], None))])
+    executor.tables['c'].schema = OrderedDict([('a_id', Column('ref a.id', True, [], None))])
+    executor._check_references(executor._get_keyspace())
+
+    executor.tables['a'].schema['x'] = Column('unique_int8', True, [], None)
+    executor.tables['c'].schema = OrderedDict([('a_id', Column('ref a.x', True, [], None))])
+    executor._check_references(executor._get_keyspace())
+
+    executor.tables['c'].schema = OrderedDict([('a_id', Column('ref a.y', True, [], None))])
+    with pytest.raises(ValueError):
+        executor._check_references(executor._get_keyspace())
+
+    executor.tables['a'].scaler = ('uniform', 1, 2)
+    executor.tables['a'].plan = None
+    with pytest.raises(ValueError):
+        executor._check_references(executor._get_keyspace())
+
+
+def test_get_references(executor):
+    executor.tables['a'].schema = OrderedDict([
+        ('id', Column('row_id', True, [], None)),
+        ('k', Column('unique_int8', True, [], None)),
+    ])
+    executor.tables['c'].schema = OrderedDict([
+        ('a_id', Column('ref a.id', True, [], None)),
+        ('a_k', Column('ref a.k', True, [], None)),
+    ])
+
+    assert executor._get_references() == {
+        'a': {}, 'b': {}, 'c': {'a.id': 'row_id', 'a.k': 'unique_int8'}}
+
+
+def test_use_client_serials(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.rows = 25
+    executor.args.batch_size = 10
+    executor.args.truncate = False
+    executor.args.resume = False
+    executor.tables['a'].schema = OrderedDict([
+        ('id', Column('skip', True, [], None, 'serial'))])
+
+    with pytest.raises(ValueError, match='--truncate'):
+        executor._use_client_serials(executor._get_keyspace())
+
+    executor.args.truncate = True
+    assert executor._use_client_serials(executor._get_keyspace()) == {'a': ['id']}
+
+
+def test_set_serials(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.rows = 25
+    executor.args.batch_size = 10
+    executor.keyspace = executor._get_keyspace()
+    executor.serials = {'b': ['id']}
+
+    db_mock = mocker.patch('lib.executor._get_worker_db').return_value
+    db_mock.call_with_reconnect.side_effect = lambda func: func(db_mock)
+    mocker.patch('lib.executor._get_worker_stats', return_value=(1, 1))
+
+    executor._run_db_cmd_on_table('set-serials', 'b')
+    db_mock.set_serial.assert_called_once_with('b', 'id', 250)
+
+
+def test_vacuum(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.args.vacuum_mode = 'vacuum-freeze'
+    executor.args.maintenance_workers = None
+    executor.args.max_parallel_workers = 2
+    executor.args.maintenance_work_mem = '1GB'
+    executor.args.max_parallel_maintenance_workers = None
+    executor.timings = {}
+    executor.task_timings = {}
+    mocker.patch.object(executor, '_get_table_sizes', return_value={'b': 10, 'c': 5})
+    pool_mock = mocker.patch('lib.executor.MaintenancePool')
+    pool = pool_mock.return_value.__enter__.return_value
+    pool.run.return_value = {'VACUUM (FREEZE, ANALYZE) b': 1.0}
+
+    executor._vacuum(['a', 'c', 'b'])
+
+    pool_mock.assert_called_once_with(executor.args.dsn, 2, {'maintenance_work_mem': '1GB'})
+    assert [label for label, _ in pool.run.call_args.args[0]] == [
+        'VACUUM (FREEZE, ANALYZE) b', 'VACUUM (FREEZE, ANALYZE) c', 'VACUUM (FREEZE, ANALYZE) a']
+    assert executor.task_timings == {'VACUUM (FREEZE, ANALYZE) b': 1.0}
+    assert 'vacuum' in executor.timings
+
+
+def test_ingest_partitioned(executor, mocker):
+    executor.args = mocker.MagicMock()
+    executor.tables['a'].partitioning = Partitioning('list', ['x'], [
+        Partition('a_1', values=[1]),
+        Partition('a_2', values=[2]),
+    ])
+    batch = Batch(OrderedDict([('x', np.array([1, 2, 1]))]), 3)
+    mocker.patch('lib.executor.Batch.sample_from_source', return_value=batch)
+    db_mock = mocker.MagicMock()
+    db_mock.call_with_reconnect.side_effect = lambda func: func(db_mock)
+    mocker.patch('lib.executor._get_worker_db', return_value=db_mock)
+    cache = mocker.MagicMock()
+
+    executor._ingest('a', None, 3, cache)
+
+    ingested = {call.args[0]: len(call.args[2]) for call in db_mock.ingest_table.mock_calls}
+    assert ingested == {'a_1': 2, 'a_2': 1}
+    cache.add.assert_called_once_with('a', batch)
@@ -0,0 +1,94 @@
+from lib.fast_load import FastLoad
+
+
+def fast_load(unlogged=False):
+    fast_load = FastLoad(['a', 'b'], unlogged=unlogged)
+    fast_load.indexes = [('b', 'b_x_idx', 'CREATE INDEX b_x_idx ON b (x)')]
+    fast_load.constraints = [
+        ('a', 'a_pkey', 'p', 'PRIMARY KEY (id)'),
+        ('b', 'b_a_fkey', 'f', 'FOREIGN KEY (a_id) REFERENCES a(id)'),
+        ('b', 'b_pkey', 'p', 'PRIMARY KEY (id)'),
+    ]
+    return fast_load
+
+
+def test_capture(mocker):
+    db = mocker.MagicMock()
+    db.get_indexes.side_effect = [[], [('b_x_idx', 'CREATE INDEX b_x_idx ON b (x)')]]
+    foreign_key = ('b', 'b_a_fkey', 'f', 'FOREIGN KEY (a_id) REFERENCES a(id)')
+    db.get_constraints.side_effect = [[foreign_key], [foreign_key]]
+
+    result = FastLoad(['a', 'b'])
+    result.capture(db)
+
+    assert result.indexes == [('b', 'b_x_idx', 'CREATE INDEX b_x_idx ON b (x)')]
+    assert result.constraints == [foreign_key]
+
+
+def test_capture_unlogged(mocker):
+    db = mocker.MagicMock()
+    foreign_key = ('b', 'b_a_fkey', 'f', 'FOREIGN KEY (a_id) REFERENCES a(id)')
+    db.get_constraints.side_effect = [
+        [('a', 'a_pkey', 'p', 'PRIMARY KEY (id)'), foreign_key],
+        [foreign_key, ('b', 'b_pkey', 'p', 'PRIMARY KEY (id)')],
+    ]
+
+    result = FastLoad(['a', 'b'], drop_indexes=False, unlogged=True)
+    result.capture(db)
+
+    db.get_indexes.assert_not_called()
+    assert result.indexes == []
+    assert result.constraints == [foreign_key]
+    assert result.prepare_statements() == [
+        'ALTER TABLE b DROP CONSTRAINT "b_a_fkey"',
+        'ALTER TABLE a SET UNLOGGED',
+        'ALTER TABLE b SET UNLOGGED',
+    ]
+    assert [[label for label, _ in wave] for wave in result.restore_waves()] == [
+        ['a logged', 'b logged'], ['b foreign key b_a_fkey']]
+
+
+def test_prepare_statements():
+    assert fast_load(unlogged=True).prepare_statements() == [
+        'ALTER TABLE b DROP CONSTRAINT "b_a_fkey"',
+        'ALTER TABLE a DROP CONSTRAINT "a_pkey"',
+        'ALTER TABLE b DROP CONSTRAINT "b_pkey"',
+        'DROP INDEX b_x_idx',
+        'ALTER TABLE a SET UNLOGGED',
+        'ALTER TABLE b SET UNLOGGED',
+    ]
+
+
+def test_restore_waves():
+    waves = fast_load().restore_waves()
+
+    assert waves == [
+        [
+            ('a constraints', ['ALTER TABLE a ADD CONSTRAINT "a_pkey" PRIMARY KEY (id)']),
+            ('b constraints', ['ALTER TABLE b ADD CONSTRAINT "b_pkey" PRIMARY KEY (id)']),
+            ('b index b_x_idx', ['CREATE INDEX b_x_idx ON b (x)']),
+        ],
+        [
+            ('b foreign key b_a_fkey', [
+                'ALTER TABLE b ADD CONSTRAINT "b_a_fkey" FOREIGN KEY (a_id) REFERENCES a(id)']),
+        ],
+    ]
+
+    waves = fast_load(unlogged=True).restore_waves({'a': 1, 'b': 2})
+    assert [label for label, _ in waves[0]] == [
+        'b constraints', 'b index b_x_idx', 'a constraints']
+    assert [label for label, _ in waves[1]] == ['b logged', 'a logged']
+
+
+def test_restore_failure(mocker):
+    pool = mocker.MagicMock()
+    pool.run.side_effect = [{'a constraints': 1.0}, RuntimeError()]
+    error_mock = mocker.patch('lib.fast_load.logger.error')
+
+    try:
+        fast_load().restore(pool)
+        assert False
+    except RuntimeError:
+        pass
+
+    assert 'b_a_fkey' in error_mock.call_args.args[0]
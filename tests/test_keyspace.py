@@ -0,0 +1,50 @@
+import numpy as np
+
+from lib.keyspace import KeySpace, UnitKeys, mix_int4, mix_int8
+
+
+def test_key_range():
+    keyspace = KeySpace({'a': 1, 'b': 10, 'c': 0.1, 'd': ('uniform', 1, 2)}, 25, 10)
+
+    assert keyspace.key_range('a', 1) == (1, 11)
+    assert keyspace.key_range('a', 3) == (21, 26)
+    assert keyspace.key_range('b', 2) == (101, 201)
+    assert keyspace.key_range('c', 3) == (3, 4)
+    assert 'd' not in keyspace
+
+
+def test_table_rows():
+    keyspace = KeySpace({'a': 1, 'b': 10, 'c': 0.1, 'd': ('uniform', 1, 2)}, 25, 10)
+
+    assert keyspace.table_rows('a') == 25
+    assert keyspace.table_rows('b') == 250
+    assert keyspace.table_rows('c') == 3
+    assert keyspace.table_rows('d') is None
+
+
+def test_unit_keys():
+    keyspace = KeySpace({'a': 1, 'b': 10, 'd': ('uniform', 1, 2)}, 25, 10)
+
+    assert keyspace.unit_keys('b', 2, {'a.id': 'row_id', 'a.k': 'unique_int8'}) == UnitKeys(
+        101, {'a.id': (11, 21, 'row_id'), 'a.k': (11, 21, 'unique_int8')})
+    assert keyspace.unit_keys('d', 2, {'a.id': 'unique_int4'}) == UnitKeys(
+        None, {'a.id': (11, 21, 'unique_int4')})
+    assert keyspace.unit_keys('a', 1) == UnitKeys(1, {})
+
+
+def test_mix_unique():
+    positions = np.arange(1, 100001)
+
+    keys = mix_int4(positions)
+    assert keys.dtype == np.int32
+    assert len(np.unique(keys)) == len(positions)
+
+    keys = mix_int8(positions)
+    assert keys.dtype == np.int64
+    assert len(np.unique(keys)) == len(positions)
+
+
+def test_mix_full_range():
+    # A bijection on 16 bits of input must not fold any of them
+    positions = np.arange(2 ** 16) << 16
+    assert len(np.unique(mix_int4(positions))) == 2 ** 16
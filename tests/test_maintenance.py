@@ -0,0 +1,55 @@
+import pytest
+
+from lib.maintenance import MaintenancePool, largest_first
+
+
+DSN = 'postgresql://postgres@nohost/nodb'
+
+
+@pytest.fixture(autouse=True)
+def mock_connect(mocker):
+    return mocker.patch('psycopg2.connect')
+
+
+def test_run(mock_connect):
+    with MaintenancePool(DSN, 2) as pool:
+        timings = pool.run([('a', ['SELECT 1', 'SELECT 2']), ('b', ['SELECT 3'])])
+
+    assert list(timings.keys()) == ['a', 'b']
+    executed = [call.args[0] for call in mock_connect.return_value.cursor.return_value
+                .execute.mock_calls]
+    assert sorted(executed) == ['SELECT 1', 'SELECT 2', 'SELECT 3']
+    assert executed.index('SELECT 1') < executed.index('SELECT 2')
+
+
+def test_run_error(mock_connect):
+    cursor = mock_connect.return_value.cursor.return_value
+    cursor.execute.side_effect = lambda statement: statement == 'fail' and 1 / 0
+
+    with MaintenancePool(DSN, 1) as pool:
+        with pytest.raises(ZeroDivisionError):
+            pool.run([('a', ['fail']), ('b', ['SELECT 1'])])
+
+    # The remaining tasks still run
+    cursor.execute.assert_called_with('SELECT 1')
+
+
+def test_run_settings(mock_connect):
+    mock_connect.return_value.closed = 0
+    cursor = mock_connect.return_value.cursor.return_value
+
+    with MaintenancePool(DSN, 1, {'maintenance_work_mem': '1GB'}) as pool:
+        pool.run([('a', ['SELECT 1']), ('b', ['SELECT 2'])])
+
+    # Settings are applied once per connection
+    assert [call.args for call in cursor.execute.mock_calls] == [
+        ('SELECT set_config(%s, %s, false)', ('maintenance_work_mem', '1GB')),
+        ('SELECT 1',),
+        ('SELECT 2',),
+    ]
+
+
+def test_largest_first():
+    tasks = [('a', 'a x', ['x']), ('b', 'b y', ['y']), ('c', 'c z', ['z'])]
+    assert largest_first(tasks, {'a': 1, 'b': 3}) == [
+        ('b y', ['y']), ('a x', ['x']), ('c z', ['z'])]
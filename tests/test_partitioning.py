@@ -0,0 +1,69 @@
+from collections import OrderedDict
+
+import numpy as np
+
+from lib.batch import Batch
+from lib.partitioning import is_routable, route_batch
+from lib.schema_parser import Partition, Partitioning
+
+
+def range_partitioning():
+    return Partitioning('range', ['a'], [
+        Partition('public.t_low', lower=[None], upper=[10]),
+        Partition('public.t_high', lower=[10], upper=[20]),
+    ])
+
+
+def test_route_range():
+    batch = Batch(OrderedDict([('a', np.array([1, 15, 10, 25])), ('b', ['w', 'x', 'y', 'z'])]), 4)
+    targets = dict(route_batch('public.t', range_partitioning(), batch))
+
+    assert targets['public.t_low'].to_csv() == '1|w\n'
+    assert targets['public.t_high'].to_csv() == '15|x\n10|y\n'
+    # Matching no partition, the server raises an error
+    assert targets['public.t'].to_csv() == '25|z\n'
+
+
+def test_route_range_datetime():
+    partitioning = Partitioning('range', ['a'], [
+        Partition('public.t_2020', lower=['2020-01-01'], upper=['2021-01-01']),
+        Partition('public.t_default', is_default=True),
+    ])
+    values = np.array(['2020-06-01', '2021-06-01'], dtype='datetime64[us]')
+    batch = Batch(OrderedDict([('a', values)]), 2)
+    targets = dict(route_batch('public.t', partitioning, batch))
+
+    assert list(targets['public.t_2020'].columns['a']) == [values[0]]
+    assert list(targets['public.t_default'].columns['a']) == [values[1]]
+
+
+def test_route_list_nulls():
+    partitioning = Partitioning('list', ['a'], [
+        Partition('public.t_x', values=['x', None]),
+        Partition('public.t_y', values=['y']),
+    ])
+    batch = Batch(OrderedDict([('a', np.array(['x', '', 'y']))]), 3,
+                  {'a': np.array([False, True, False])})
+    targets = dict(route_batch('public.t', partitioning, batch))
+
+    assert list(targets['public.t_x'].column('a')) == ['x', None]
+    assert list(targets['public.t_y'].column('a')) == ['y']
+
+
+def test_route_rotate():
+    batch = Batch(OrderedDict([('a', np.array([1, 15]))]), 2)
+    targets = route_batch('public.t', range_partitioning(), batch, offset=3)
+    assert [name for name, _ in targets] == ['public.t_high', 'public.t_low']
+
+
+def test_route_not_routable():
+    partitioning = Partitioning('hash', ['a'], [Partition('public.t_0')])
+    assert not is_routable(partitioning)
+
+    batch = Batch(OrderedDict([('a', np.array([1, 2]))]), 2)
+    assert route_batch('public.t', partitioning, batch) == [('public.t', batch)]
+
+    # Ranges of strings depend on the collation
+    partitioning = Partitioning('range', ['a'], [Partition('public.t_0', lower=['a'], upper=['m'])])
+    batch = Batch(OrderedDict([('a', np.array(['b', 'x']))]), 2)
+    assert route_batch('public.t', partitioning, batch) == [('public.t', batch)]
@@ -0,0 +1,71 @@
+import pytest
+
+from lib.pipeline import IngestPipeline, PipelineAborted
+
+
+class FakeDB:
+    def __init__(self, fail_on=None):
+        self.ingested = []
+        self.fail_on = fail_on
+
+    def ingest_batches(self, table, schema, batches, copy_format, chunk_rows, truncate=False,
+                       checkpoint=None):
+        rows = []
+        for batch in batches:
+            if batch == self.fail_on:
+                raise ValueError('COPY failed')
+            rows.append(batch)
+
+        self.ingested.append((table, rows))
+
+
+def test_pipeline():
+    db = FakeDB()
+    pipeline = IngestPipeline(db, 'csv', 10, queue_size=1)
+    pipeline.start()
+
+    pipeline.begin('a', {})
+    pipeline.put(1)
+    pipeline.put(2)
+    pipeline.end()
+    pipeline.begin('b', {})
+    pipeline.put(3)
+    pipeline.end()
+    pipeline.close()
+
+    assert db.ingested == [('a', [1, 2]), ('b', [3])]
+
+
+def test_pipeline_ingest_error():
+    db = FakeDB(fail_on=2)
+    pipeline = IngestPipeline(db, 'csv', 10, queue_size=1)
+    pipeline.start()
+
+    pipeline.begin('a', {})
+    for batch in range(5):
+        try:
+            pipeline.put(batch)
+        except ValueError:
+            break
+    pipeline.end()
+
+    with pytest.raises(ValueError):
+        pipeline.close()
+
+    assert not pipeline.is_alive()
+
+
+def test_pipeline_abort(mocker):
+    db = FakeDB()
+    ingest_spy = mocker.spy(db, 'ingest_batches')
+
+    pipeline = IngestPipeline(db, 'csv', 10)
+    pipeline.start()
+    pipeline.begin('a', {})
+    pipeline.put(1)
+    pipeline.abort()
+
+    assert not pipeline.is_alive()
+    assert db.ingested == []
+    assert isinstance(pipeline._error, PipelineAborted)
+    ingest_spy.assert_called_once()
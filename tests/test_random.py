@@ -0,0 +1,168 @@
+from datetime import date, datetime
+from uuid import UUID
+
+import numpy as np
+import pytest
+
+from lib.random import Random
+
+
+def test_whole_number_batch():
+    values = Random(seed=1).whole_number(-10, 10, granularity=5, size=1000)
+    assert len(values) == 1000
+    assert values.min() >= -10
+    assert values.max() <= 10
+    assert set(values) <= {-10, -5, 0, 5, 10}
+
+
+def test_int_batch_bounds():
+    rand_gen = Random(seed=1)
+    assert rand_gen.int2(size=100).dtype == np.int64
+    assert len(rand_gen.int4(size=100)) == 100
+    assert len(rand_gen.int8(size=100)) == 100
+
+
+def test_bool_sample():
+    rand_gen = Random(seed=1)
+    assert rand_gen.bool_sample(1.0) is not None
+    assert len(rand_gen.bool_sample(0.5, size=1)) == 1
+    assert rand_gen.bool_sample(1.0, size=10).all()
+
+
+def test_categorical_batch():
+    rand_gen = Random(seed=1)
+    assert set(rand_gen.employment(size=1000)) == {'UNEMPLOYED', 'SELF EMPLOYED', 'EMPLOYED'}
+    assert set(rand_gen.num_children(size=1000)) == {0, 1, 2, 3}
+
+
+def test_uniform_batch():
+    values = Random(seed=1).uniform(1, 2, precision=1, size=100)
+    assert ((values >= 1) & (values <= 2)).all()
+    assert np.array_equal(values, np.round(values, 1))
+
+
+def test_batch_reproducible():
+    assert np.array_equal(Random(seed=3).int8(size=10), Random(seed=3).int8(size=10))
+
+
+def test_choose_from_list_batch():
+    choices = np.array(['a', 'b', 'c'])
+    values = Random(seed=1).choose_from_list(choices, picks=100)
+    assert len(values) == 100
+    assert set(values) == {'a', 'b', 'c'}
+
+    assert len(Random(seed=1).choose_from_list(np.empty(0), picks=0)) == 0
+    with pytest.raises(ValueError):
+        Random(seed=1).choose_from_list(np.empty(0), picks=1)
+
+
+def test_unique_int():
+    rand_gen = Random(seed=1)
+
+    keys = rand_gen.unique_int4(11, size=10)
+    assert list(keys[5:]) == list(rand_gen.unique_int4(16, size=5))
+    assert rand_gen.unique_int4(11) == keys[0]
+    assert len(set(keys)) == 10
+
+    keys = rand_gen.unique_int8(11, size=10)
+    assert rand_gen.unique_int8(20) == keys[-1]
+
+
+def test_ref_unique_int():
+    rand_gen = Random(seed=1)
+    parent_keys = rand_gen.unique_int8(11, size=10)
+
+    keys = rand_gen.ref(11, 21, 'unique_int8', size=100)
+    assert set(keys) <= set(parent_keys)
+    assert rand_gen.ref(11, 21, 'unique_int8') in set(parent_keys)
+    assert len(rand_gen.ref(11, 21, size=0)) == 0
+
+
+def test_uuid_batch():
+    values = Random(seed=1).uuid(size=100)
+    assert values.shape == (100,)
+    assert list(values) == list(Random(seed=1).uuid(size=100))
+
+    for value in values:
+        uuid = UUID(value)
+        assert str(uuid) == value
+        assert uuid.version == 4
+
+    assert Random(seed=1).uuid() == Random(seed=1).uuid()
+    assert Random(seed=1).uuid().version == 4
+
+
+def test_md5_batch():
+    values = Random(seed=1).md5(size=100)
+    assert list(values) == list(Random(seed=1).md5(size=100))
+    assert all(len(value) == 32 and int(value, 16) >= 0 for value in values)
+    assert len(set(values)) == 100
+
+    assert Random(seed=1).md5() == Random(seed=1).md5()
+
+
+def test_unicode_batch():
+    values = Random(seed=1).unicode(5, size=100)
+    assert values.shape == (100,)
+    assert all(len(value) == 5 for value in values)
+    assert set(''.join(values)) <= set(Random.UTF8_ALPHABET)
+    assert list(values) == list(Random(seed=1).unicode(5, size=100))
+
+    value = Random(seed=1).unicode(5)
+    assert isinstance(value, str) and len(value) == 5
+
+
+def test_string_batch():
+    rand_gen = Random(seed=1)
+    alphabet = set(map(chr, Random.STRING_CODES))
+
+    values = rand_gen.varchar(20, size=1000)
+    lengths = [len(value) for value in values]
+    assert min(lengths) == 1 and max(lengths) == 20
+    assert set(''.join(values)) <= alphabet
+
+    assert all(len(value) == 32 for value in rand_gen.bpchar(32, size=10))
+    assert all(16 <= len(value) <= 128 for value in rand_gen.string(size=10))
+    assert len(rand_gen.string(7)) == 7
+    assert len(rand_gen.varchar(1, size=0)) == 0
+
+
+def test_words_batch():
+    values = Random(seed=1).random_text(5, 10, size=100)
+    assert values.shape == (100,)
+    assert all(5 <= len(value.split(' ')) <= 10 for value in values)
+    assert list(values) == list(Random(seed=1).random_text(5, 10, size=100))
+
+    assert len(Random(seed=1).words(3).split(' ')) == 3
+    assert all(len(value.split(' ')) == 3 for value in Random(seed=1).words(3, size=10))
+
+
+def test_datetime_batch():
+    rand_gen = Random(seed=1)
+
+    values = rand_gen.timestamp(2001, 2002, size=1000)
+    assert values.dtype == np.dtype('datetime64[us]')
+    assert values.min() >= np.datetime64('2001-01-01')
+    assert values.max() < np.datetime64('2003-01-01')
+
+    values = rand_gen.date(size=1000)
+    assert values.dtype == np.dtype('datetime64[D]')
+    assert isinstance(rand_gen.date(), date)
+    assert isinstance(rand_gen.timestamptz(), datetime)
+
+
+def test_timeseries():
+    rand_gen = Random(seed=1)
+
+    values = rand_gen.timeseries(11, '2020-01-01', 60, 30, size=100)
+    assert np.all(np.diff(values) > np.timedelta64(0))
+    assert values[0] >= np.datetime64('2020-01-01T00:10')
+    assert values[0] < np.datetime64('2020-01-01T00:10:30')
+
+    assert rand_gen.timeseries(2, '2020-01-01', 60) == datetime(2020, 1, 1, 0, 1)
+
+
+def test_add_processing_time_batch():
+    base = np.array(['2020-01-01'] * 100, dtype='datetime64[us]')
+    values = Random(seed=1).add_processing_time(base, 10, size=100)
+    assert np.all(values >= base)
@@ -0,0 +1,45 @@
+import json
+
+from xml.etree import ElementTree
+
+import pytest
+
+from lib.random import Random
+from lib.random_data import RandomData
+
+
+def test_render_batch_json():
+    documents = RandomData.render_batch(Random(seed=1), 'a "b"', 'json', 10, 5, 10)
+    assert len(documents) == 10
+
+    for document in documents:
+        data = json.loads(document)
+        assert data['type'] == 'a "b"'
+        assert len(data['id']) == 32
+        assert 5 <= len(data['data']['response'].split(' ')) <= 10
+        assert data['binary'] == ''
+
+    assert list(documents) == list(
+        RandomData.render_batch(Random(seed=1), 'a "b"', 'json', 10, 5, 10))
+
+
+def test_render_batch_xml():
+    documents = RandomData.render_batch(Random(seed=1), 'a<b', 'xml', 10, 5, 10)
+
+    for document in documents:
+        root = ElementTree.fromstring(document.encode('utf-8'))
+        assert root.find('type').text == 'a<b'
+        assert len(root.find('id').text) == 36
+        assert 5 <= len(root.find('data/response').text.split(' ')) <= 10
+
+
+def test_render_batch_unknown():
+    with pytest.raises(ValueError):
+        RandomData.render_batch(Random(seed=1), 'a', 'yaml', 10)
+
+
+def test_document_columns():
+    rand_gen = Random(seed=1)
+    assert len(rand_gen.jsonb(size=3)) == 3
+    assert json.loads(rand_gen.json())['type'] == 'data'
+    assert ElementTree.fromstring(rand_gen.xml().encode('utf-8')).tag == 'root'
@@ -0,0 +1,53 @@
+import pytest
+
+from lib.scheduler import DagScheduler, Unit
+
+
+GRAPH = {
+    'a': ['c', 'b'],
+    'b': [],
+    'c': ['b'],
+    'd': [],
+}
+
+
+def test_parents():
+    scheduler = DagScheduler(GRAPH, ['a', 'd', 'c', 'b'], {})
+    assert scheduler.parents == {'a': [], 'd': [], 'c': ['a'], 'b': ['a', 'c']}
+
+
+def test_parents_from_deps():
+    # No edges, but b chooses from a
+    scheduler = DagScheduler({'a': [], 'b': []}, ['a', 'b'], {'b': {'a.id'}})
+    assert scheduler.parents == {'a': [], 'b': ['a']}
+
+    assert scheduler.add_batch(1, 10) == [Unit('a', 1, 10)]
+    assert scheduler.complete(Unit('a', 1, 10), {'a.id': [1, 2]}) == [Unit('b', 1, 10)]
+    assert scheduler.dependency_data(Unit('b', 1, 10)) == {'a.id': [1, 2]}
+
+
+def test_cyclic_deps():
+    with pytest.raises(ValueError):
+        DagScheduler({'a': ['b'], 'b': []}, ['a', 'b'], {'a': {'b.id'}})
+
+
+def test_cyclic():
+    with pytest.raises(ValueError):
+        DagScheduler({'a': ['b'], 'b': ['a']}, ['a', 'b'], {})
+
+
+def test_schedule():
+    scheduler = DagScheduler(GRAPH, ['a', 'd', 'c', 'b'], {'b': {'a.x', 'c.y'}})
+
+    assert scheduler.add_batch(1, 10) == [Unit('a', 1, 10), Unit('d', 1, 10)]
+    assert scheduler.add_batch(2, 5) == [Unit('a', 2, 5), Unit('d', 2, 5)]
+    assert scheduler.num_open_batches == 2
+
+    assert scheduler.complete(Unit('a', 1, 10), {'a.x': [1, 2]}) == [Unit('c', 1, 10)]
+    assert scheduler.complete(Unit('d', 1, 10), {}) == []
+    assert scheduler.complete(Unit('c', 1, 10), {'c.y': [3]}) == [Unit('b', 1, 10)]
+    assert scheduler.dependency_data(Unit('b', 1, 10)) == {'a.x': [1, 2], 'c.y': [3]}
+    assert scheduler.dependency_data(Unit('c', 1, 10)) == {}
+
+    assert scheduler.complete(Unit('b', 1, 10), {}) == []
+    assert scheduler.num_open_batches == 1
@@ -0,0 +1,108 @@
+import json
+
+from lib.schema_parser import Partition, Schema
+
+
+def const(value):
+    if isinstance(value, int):
+        return {'A_Const': {'val': {'Integer': {'ival': value}}}}
+
+    return {'A_Const': {'val': {'String': {'str': value}}}}
+
+
+def create_stmt(relname, **kwargs):
+    return {'stmt': {'CreateStmt': {'relation': {'relname': relname}, **kwargs}}}
+
+
+def column_def(name, type_name, location=0, typmods=None):
+    type_names = [{'String': {'str': 'pg_catalog'}}, {'String': {'str': type_name}}]
+    column = {'colname': name, 'location': location, 'typeName': {'names': type_names}}
+    if typmods:
+        column['typeName']['typmods'] = [const(typmod) for typmod in typmods]
+
+    return {'ColumnDef': column}
+
+
+def parse_schema(mocker, tmp_path, raw_schema, stmts):
+    mocker.patch('lib.schema_parser.parse_sql_json', return_value=json.dumps({'stmts': stmts}))
+    schema_path = tmp_path / 't.sql'
+    schema_path.write_text(raw_schema)
+    return Schema(str(schema_path))
+
+
+def test_parse_create_table_annotated_numeric(mocker, tmp_path):
+    raw_schema = 'v NUMERIC -- gen: int4\nw VARCHAR(32)\n'
+    schema = parse_schema(mocker, tmp_path, raw_schema, [create_stmt('t', tableElts=[
+        column_def('v', 'numeric'),
+        column_def('w', 'varchar', raw_schema.index('w'), [32]),
+    ])])
+
+    columns = schema.parse_create_table()
+    assert columns['v'].gen == 'int4'
+    assert columns['v'].pg_type == 'numeric'
+    assert columns['v'].pg_type_args == []
+    assert columns['w'].pg_type_args == [32]
+
+
+def test_parse_create_table_annotated_args(mocker, tmp_path):
+    raw_schema = ('t TIMESTAMP -- gen: timeseries 2021-01-01 60 0.5\n'
+                  'd DATE -- gen: date 2010 2020\n'
+                  'a INT -- gen: choose_from_list public.a.id\n')
+    schema = parse_schema(mocker, tmp_path, raw_schema, [create_stmt('t', tableElts=[
+        column_def('t', 'timestamp'),
+        column_def('d', 'date', raw_schema.index('d ')),
+        column_def('a', 'int4', raw_schema.index('a ')),
+    ])])
+
+    columns = schema.parse_create_table()
+    assert columns['t'].gen == 'timeseries'
+    assert columns['t'].args == ['2021-01-01', 60, 0.5]
+    assert columns['d'].gen == 'date'
+    assert columns['d'].args == [2010, 2020]
+    assert columns['a'].gen == 'choose_from_list public.a.id'
+    assert columns['a'].args == []
+
+
+def test_parse_partitioning(mocker, tmp_path):
+    column = {'ColumnDef': {
+        'colname': 'a', 'location': 0,
+        'typeName': {'names': [{'String': {'str': 'pg_catalog'}}, {'String': {'str': 'int4'}}]},
+    }}
+    minvalue = {'ColumnRef': {'fields': [{'String': {'str': 'minvalue'}}]}}
+    parent = [{'RangeVar': {'relname': 't'}}]
+    schema = {'stmts': [
+        create_stmt('t', tableElts=[column], partspec={
+            'strategy': 'range', 'partParams': [{'PartitionElem': {'name': 'a'}}]}),
+        create_stmt('t_low', inhRelations=parent, partbound={
+            'strategy': 'r', 'lowerdatums': [minvalue], 'upperdatums': [const(10)]}),
+        create_stmt('t_high', inhRelations=parent, partbound={
+            'strategy': 'r', 'lowerdatums': [const(10)], 'upperdatums': [const(20)]}),
+        create_stmt('t_other', inhRelations=parent, partbound={
+            'strategy': 'r', 'is_default': True}),
+        create_stmt('t_sub', inhRelations=[{'RangeVar': {'relname': 't_other'}}], partbound={
+            'strategy': 'l', 'listdatums': [const('x')]}),
+    ]}
+    mocker.patch('lib.schema_parser.parse_sql_json', return_value=json.dumps(schema))
+    schema_path = tmp_path / 't.sql'
+    schema_path.write_text('a INT\n')
+
+    schema = Schema(str(schema_path))
+    assert list(schema.parse_create_table().keys()) == ['a']
+
+    partitioning = schema.parse_partitioning()
+    assert partitioning.strategy == 'range'
+    assert partitioning.columns == ['a']
+    assert partitioning.partitions == [
+        Partition('public.t_low', lower=[None], upper=[10]),
+        Partition('public.t_high', lower=[10], upper=[20]),
+        Partition('public.t_other', is_default=True),
+    ]
+
+
+def test_parse_partitioning_none(mocker, tmp_path):
+    schema = {'stmts': [create_stmt('t', tableElts=[])]}
+    mocker.patch('lib.schema_parser.parse_sql_json', return_value=json.dumps(schema))
+    schema_path = tmp_path / 't.sql'
+    schema_path.write_text('')
+
+    assert Schema(str(schema_path)).parse_partitioning() is None
@@ -0,0 +1,55 @@
+import threading
+
+from collections import OrderedDict
+
+import numpy as np
+import pytest
+
+from lib.batch import Batch
+from lib.schema_parser import Column
+from lib.shared_cache import SharedCache, SharedStore
+
+
+@pytest.fixture
+def store():
+    store = SharedStore.create({'a.id': ('<i8', 4), 'a.name': ('<U3', 4)})
+    yield store
+    store.close()
+    store.unlink()
+
+
+def test_get_dtype():
+    assert SharedStore.get_dtype(Column('md5', True, [], None, 'bpchar', [32])) == '<U32'
+    assert SharedStore.get_dtype(Column('int4', True, [], None, 'int4')) == '<i8'
+    assert SharedStore.get_dtype(Column('date', True, [], None, 'date')) == '<M8[D]'
+
+    with pytest.raises(ValueError):
+        SharedStore.get_dtype(Column('text', True, [], None, 'text'))
+
+
+def test_shared_cache(store):
+    lock = threading.Lock()
+    cache = SharedCache(set((('a', 'id'), ('a', 'name'))), store, lock)
+
+    cache.add('a', Batch(OrderedDict([
+        ('id', np.array([1, 2, 3])),
+        ('name', np.array(['x', 'y', 'z'])),
+    ]), 3, {'name': np.array([False, True, False])}))
+
+    # Another process attaching to the same store sees the data
+    attached = SharedStore(store.specs)
+    other = SharedCache(set((('a', 'id'), ('a', 'name'))), attached, lock)
+    assert list(other.retrieve('a.id')) == [1, 2, 3]
+    assert list(other.retrieve('a.name')) == ['x', 'z']
+    assert other.retrieve_table('a') == {}
+
+    # Capacity is exhausted, values beyond are dropped
+    other.add('a', Batch(OrderedDict([
+        ('id', np.array([4, 5])),
+        ('name', np.array(['u', 'v'])),
+    ]), 2))
+    assert list(cache.retrieve('a.id')) == [1, 2, 3, 4]
+    assert list(cache.retrieve('a.name')) == ['x', 'z', 'u', 'v']
+    assert len(cache.retrieve('b.id')) == 0
+
+    attached.close()
@@ -4,7 +4,8 @@ from collections import OrderedDict
 import pytest
 
 from lib.schema_parser import Column
-from lib.table import Table
+from lib.random import Random
+from lib.table import ColumnPlan, Table
 
 
 def test_get_column_dependecies(mocker):
@@ -18,3 +19,66 @@ def test_get_column_dependecies(mocker):
     table = Table(schema_path='foobar.sql', scaler=0.42)
     deps = table.get_column_dependencies()
     assert deps == set((('a.b', 'c'),))
+
+
+def test_get_plan(mocker):
+    schema_mock = mocker.patch('lib.schema_parser.Schema')
+    schema_mock.return_value.parse_create_table.return_value = OrderedDict([
+        ('a', Column('int4', True, [], None)),
+        ('b', Column('skip', True, [], None)),
+        ('c', Column('choose_from_list x.y.z', True, [], 0.5)),
+        ('d', Column('md5', True, [], None)),
+        ('e', Column('numeric', True, [10, 2], None)),
+    ])
+
+    table = Table(schema_path='foobar.sql', scaler=1)
+    plan = table.get_plan()
+
+    assert [column.name for column in plan] == ['a', 'c', 'd', 'e']
+    assert plan[0] == ColumnPlan('a', Random.int4, (), None, True, None)
+    assert plan[1] == ColumnPlan('c', Random.choose_from_list, (), 0.5, False, 'x.y.z')
+    assert plan[2] == ColumnPlan('d', Random.md5, (), None, True, None)
+    assert plan[3] == ColumnPlan('e', Random.numeric, (10, 2), None, True, None)
+
+    # Compiled only once
+    assert table.get_plan() is plan
+
+
+def test_get_plan_unknown_gen(mocker):
+    schema_mock = mocker.patch('lib.schema_parser.Schema')
+    schema_mock.return_value.parse_create_table.return_value = OrderedDict([
+        ('a', Column('foobar', True, [], None)),
+    ])
+
+    with pytest.raises(ValueError):
+        Table(schema_path='foobar.sql', scaler=1).get_plan()
+
+
+def test_get_column_references(mocker):
+    schema_mock = mocker.patch('lib.schema_parser.Schema')
+    schema_mock.return_value.parse_create_table.return_value = OrderedDict([
+        ('a', Column('row_id', True, [], None)),
+        ('b', Column('ref x.y.id', True, [], None)),
+        ('c', Column('choose_from_list x.z.id', True, [], None)),
+    ])
+
+    table = Table(schema_path='foobar.sql', scaler=1)
+    assert table.get_column_references() == set((('x.y', 'id'),))
+    assert table.get_column_dependencies() == set((('x.z', 'id'),))
+    assert table.get_plan()[1] == ColumnPlan('b', Random.ref, (), None, True, 'x.y.id')
+
+
+def test_use_client_serials(mocker):
+    schema_mock = mocker.patch('lib.schema_parser.Schema')
+    schema_mock.return_value.parse_create_table.return_value = OrderedDict([
+        ('a', Column('skip', True, [], None, 'bigserial')),
+        ('b', Column('skip', True, [], None, 'int4')),
+        ('c', Column('int4', True, [], None, 'int4')),
+    ])
+
+    table = Table(schema_path='foobar.sql', scaler=1)
+    assert [column.name for column in table.get_plan()] == ['c']
+
+    assert table.use_client_serials() == ['a']
+    assert table.get_plan()[0] == ColumnPlan('a', Random.row_id, (), None, True, None)
+    assert [column.name for column in table.get_plan()] == ['a', 'c']
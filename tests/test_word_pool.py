@@ -0,0 +1,27 @@
+import numpy as np
+
+from lib.word_pool import WordPool, get_word_pool
+
+
+def test_texts():
+    pool = WordPool(['a', 'bb', 'ccc'])
+    texts = pool.texts(np.random.default_rng(1), [2, 0, 1, 3])
+
+    assert len(texts) == 4
+    assert [len(text.split(' ')) for text in texts if text] == [2, 1, 3]
+    assert texts[1] == ''
+    assert set(' '.join(texts).split()) <= {'a', 'bb', 'ccc'}
+
+
+def test_texts_separator():
+    pool = WordPool(['a'])
+    assert list(pool.texts(np.random.default_rng(1), [3, 1], separator=', ')) == [
+        'a, a, a', 'a']
+
+
+def test_get_word_pool():
+    assert get_word_pool() is get_word_pool()
+    assert len(get_word_pool()) > 1000
+
+    words = get_word_pool().words.tolist()
+    assert words == sorted(set(words))